@@ -1,7 +1,6 @@
 import os
-from groq import Groq
+from app.ai.llm import INTERACTIVE, complete
 
-_client = Groq(api_key=os.environ["GROQ_API_KEY"])
 MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 
 
@@ -34,7 +33,7 @@ Question:
 
 
 def classify(question: str, author_name: str | None) -> str:
-    resp = _client.chat.completions.create(
+    content = complete(
         model=MODEL,
         temperature=0,
         max_tokens=1,
@@ -42,9 +41,11 @@ def classify(question: str, author_name: str | None) -> str:
             {"role": "system", "content": classifier_prompt(author_name)},
             {"role": "user", "content": question},
         ],
+        priority=INTERACTIVE,
+        site="chat.classify",
     )
 
-    label = resp.choices[0].message.content.strip().upper()
+    label = content.strip().upper()
     if label not in {"A", "B", "C"}:
         return "C"
     return label
@@ -116,13 +117,15 @@ QUESTION:
         system = GENERAL_ASSISTANT
         user = question
 
-    resp = _client.chat.completions.create(
+    content = complete(
         model=MODEL,
         temperature=0.2,
         messages=[
             {"role": "system", "content": system},
             {"role": "user", "content": user},
         ],
+        priority=INTERACTIVE,
+        site="chat.answer",
     )
 
-    return resp.choices[0].message.content.strip()
+    return content.strip()
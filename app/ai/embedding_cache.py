@@ -0,0 +1,112 @@
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.registry import resource
+
+CACHE_PATH = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite3")
+LRU_SIZE = int(os.getenv("EMBED_CACHE_LRU", "20000"))
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    (model, sha256 of normalized text) -> float32 vector.
+
+    A bounded in-memory LRU sits in front of a SQLite file, so vectors
+    survive restarts and re-ingests without touching the model.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, lru_size: int = LRU_SIZE):
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("pragma journal_mode=wal")
+            self._db.execute("""
+                create table if not exists embeddings (
+                    model text not null,
+                    text_hash text not null,
+                    vec blob not null,
+                    primary key (model, text_hash)
+                )
+            """)
+            self._db.commit()
+
+    def _remember(self, key, vec):
+        self._lru[key] = vec
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_many(self, model: str, hashes: list[str]) -> dict:
+        found = {}
+        with self._lock:
+            for h in hashes:
+                vec = self._lru.get((model, h))
+                if vec is not None:
+                    self._lru.move_to_end((model, h))
+                    found[h] = vec
+            self.hits_memory += len(found)
+
+            missing = [h for h in set(hashes) if h not in found]
+            if missing and self._db is not None:
+                for i in range(0, len(missing), 500):
+                    part = missing[i : i + 500]
+                    rows = self._db.execute(
+                        f"select text_hash, vec from embeddings "
+                        f"where model = ? and text_hash in ({','.join('?' * len(part))})",
+                        [model, *part],
+                    ).fetchall()
+                    for h, blob in rows:
+                        vec = np.frombuffer(blob, dtype=np.float32)
+                        found[h] = vec
+                        self._remember((model, h), vec)
+                        self.hits_disk += 1
+
+            self.misses += len(set(hashes) - found.keys())
+        return found
+
+    def put_many(self, model: str, items: dict):
+        with self._lock:
+            for h, vec in items.items():
+                self._remember((model, h), vec)
+            if self._db is not None:
+                self._db.executemany(
+                    "insert or replace into embeddings (model, text_hash, vec) values (?, ?, ?)",
+                    [(model, h, vec.tobytes()) for h, vec in items.items()],
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else None,
+            "lru_entries": len(self._lru),
+        }
+
+
+@resource("embedding_cache")
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache()
@@ -1,8 +1,40 @@
-from app.ai.model_store import get_embedding_model
+import numpy as np
 
-_model = get_embedding_model()
+from app.ai.model_store import EMBEDDING_MODEL_KEY, get_embedding_model
+from app.ai.embedding_cache import get_embedding_cache, normalize_text, text_key
+
+
+def embed_matrix(texts: list[str]) -> np.ndarray:
+    """
+    Normalized float32 embeddings, shape (len(texts), dim). Only texts not
+    already in the embedding cache are sent to the model.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    cache = get_embedding_cache()
+    keys = [text_key(t) for t in texts]
+    found = cache.get_many(EMBEDDING_MODEL_KEY, keys)
+
+    todo = {}
+    for k, t in zip(keys, texts):
+        if k not in found:
+            todo.setdefault(k, normalize_text(t))
+
+    if todo:
+        vecs = get_embedding_model().encode(
+            list(todo.values()), normalize_embeddings=True
+        )
+        fresh = {k: np.asarray(v, dtype=np.float32) for k, v in zip(todo, vecs)}
+        cache.put_many(EMBEDDING_MODEL_KEY, fresh)
+        found.update(fresh)
+
+    return np.vstack([found[k] for k in keys])
 
 
 def embed_texts(texts: list[str]) -> list[list[float]]:
-    vecs = _model.encode(texts, normalize_embeddings=True)
-    return [v.tolist() for v in vecs]
+    return [v.tolist() for v in embed_matrix(texts)]
+
+
+def embedding_cache_stats() -> dict:
+    return get_embedding_cache().stats()
@@ -2,12 +2,12 @@ import os
 import re
 import json
 import hashlib
-from groq import Groq
+from app.ai.llm import INGEST, complete
 
 PROMPT_VERSION = "v1"
 MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-instruct")
-
-_client = Groq(api_key=os.environ["GROQ_API_KEY"])
+# the analysis itself plus at most one JSON repair
+MAX_CALLS_PER_ARTICLE = 2
 
 
 SYSTEM = """You analyze opinion articles neutrally. First determine if the article has a single coherent thesis.
@@ -49,7 +49,7 @@ def extract_json(text: str) -> dict:
     return json.loads(raw)
 
 
-def repair_json(bad_output: str) -> dict:
+def repair_json(bad_output: str, priority: int = INGEST) -> dict:
     repair_prompt = f"""
 Convert the following text into VALID JSON.
 
@@ -72,13 +72,13 @@ TEXT:
 {bad_output}
 """
 
-    resp = _client.chat.completions.create(
+    fixed = complete(
         model=MODEL,
         temperature=0,
         messages=[{"role": "user", "content": repair_prompt}],
-    )
-
-    fixed = resp.choices[0].message.content.strip()
+        priority=priority,
+        site="repair_json",
+    ).strip()
     return extract_json(fixed)
 
 
@@ -101,37 +101,54 @@ def compute_prompt_hash(payload: str) -> str:
     return h.hexdigest()
 
 
+def build_payload(clean_text: str) -> str:
+    # deterministic truncation
+    head = clean_text[:12000]
+    tail = clean_text[-4000:] if len(clean_text) > 16000 else ""
+    return head + ("\n\n[...]\n\n" + tail if tail else "")
+
+
+def article_prompt_hash(clean_text: str) -> str:
+    """
+    Hash analyze_article would store for this text, without calling the LLM.
+    """
+    return compute_prompt_hash(build_payload(clean_text))
+
+
 # ---------- Main analysis ----------
 
 
-def analyze_article(clean_text: str):
+def analyze_article(clean_text: str, priority: int = INGEST, on_call=None):
     """
     Returns:
         analysis_dict, model_name, prompt_hash
-    """
 
-    # deterministic truncation
-    head = clean_text[:12000]
-    tail = clean_text[-4000:] if len(clean_text) > 16000 else ""
-    payload = head + ("\n\n[...]\n\n" + tail if tail else "")
+    on_call, if given, is called once per LLM request, including the JSON
+    repair.
+    """
 
+    payload = build_payload(clean_text)
     prompt_hash = compute_prompt_hash(payload)
 
-    resp = _client.chat.completions.create(
+    if on_call:
+        on_call()
+    content = complete(
         model=MODEL,
         temperature=0.2,
         messages=[
             {"role": "system", "content": SYSTEM},
             {"role": "user", "content": payload},
         ],
-    )
-
-    content = resp.choices[0].message.content.strip()
+        priority=priority,
+        site="analyze_article",
+    ).strip()
 
     try:
         analysis = extract_json(content)
     except Exception:
         print("Attempting JSON repair...")
-        analysis = repair_json(content)
+        if on_call:
+            on_call()
+        analysis = repair_json(content, priority)
 
     return analysis, MODEL, prompt_hash
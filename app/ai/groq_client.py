@@ -0,0 +1,11 @@
+import os
+
+from app.registry import resource
+
+
+@resource("groq_async")
+def get_async_groq_client():
+    from groq import AsyncGroq
+
+    # retries and rate limiting are handled by app.ai.llm's scheduler
+    return AsyncGroq(api_key=os.environ["GROQ_API_KEY"], max_retries=0)
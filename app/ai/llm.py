@@ -0,0 +1,314 @@
+"""
+Central scheduler for every Groq chat call.
+
+All call sites go through complete(), which hands the request to one
+asyncio loop running in a background thread. The loop dispatches requests
+in priority order, subject to a requests/min and a tokens/min bucket
+and a cap on calls in flight, and retries 429/5xx with backoff.
+"""
+
+import os
+import time
+import random
+import asyncio
+import itertools
+import threading
+import concurrent.futures
+from collections import defaultdict
+
+from app.ai.groq_client import get_async_groq_client
+from app.registry import resource
+
+LLM_RPM = float(os.getenv("GROQ_RPM", "30"))
+LLM_TPM = float(os.getenv("GROQ_TPM", "6000"))
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "600"))  # incl. time queued
+
+# lower runs first
+INTERACTIVE = 0
+INGEST = 1
+BACKFILL = 2
+
+DEFAULT_COMPLETION_TOKENS = 512
+
+
+def estimate_tokens(messages, max_tokens=None) -> int:
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + (max_tokens or DEFAULT_COMPLETION_TOKENS)
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, n: float) -> float:
+        self._refill()
+        n = min(n, self.capacity)
+        return 0.0 if self.tokens >= n else (n - self.tokens) / self.rate
+
+    def take(self, n: float):
+        self._refill()
+        self.tokens -= n  # may go negative when usage exceeds the estimate
+
+    def drain(self, seconds: float):
+        # provider said slow down: stop spending for a while
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class LLMScheduler:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._seq = itertools.count()
+        self._stats = defaultdict(
+            lambda: {
+                "calls": 0,
+                "errors": 0,
+                "retries": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "latency_s": 0.0,
+                "max_latency_s": 0.0,
+                "queue_wait_s": 0.0,
+                "cancelled": 0,
+            }
+        )
+        self._stats_lock = threading.Lock()
+
+        ready = threading.Event()
+        threading.Thread(
+            target=self._run_loop, args=(ready,), name="llm-scheduler", daemon=True
+        ).start()
+        ready.wait()
+
+    def _run_loop(self, ready):
+        asyncio.set_event_loop(self.loop)
+        self.queue = asyncio.PriorityQueue()
+        self.slots = asyncio.Semaphore(LLM_CONCURRENCY)
+        self.requests = TokenBucket(LLM_RPM)
+        self.tokens = TokenBucket(LLM_TPM)
+        self.loop.create_task(self._dispatch())
+        ready.set()
+        self.loop.run_forever()
+
+    # ---------- public API ----------
+
+    def complete(
+        self,
+        messages,
+        model,
+        temperature=0,
+        max_tokens=None,
+        priority=INGEST,
+        site="unknown",
+    ) -> str:
+        """
+        Blocking call from any thread; returns the message content. A call
+        that times out is cancelled, so it never spends rate-limit budget.
+        """
+        fut = asyncio.run_coroutine_threadsafe(
+            self.acomplete(messages, model, temperature, max_tokens, priority, site),
+            self.loop,
+        )
+        try:
+            return fut.result(timeout=LLM_TIMEOUT)
+        except concurrent.futures.TimeoutError:
+            # a distinct class from the builtin TimeoutError before 3.11
+            fut.cancel()
+            raise
+
+    async def acomplete(
+        self,
+        messages,
+        model,
+        temperature=0,
+        max_tokens=None,
+        priority=INGEST,
+        site="unknown",
+    ) -> str:
+        job = {
+            "messages": messages,
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "priority": priority,
+            "site": site,
+            "attempt": 0,
+            "queued_at": time.monotonic(),
+            "future": self.loop.create_future(),
+        }
+        await self._enqueue(job)
+        return await job["future"]
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            out = {}
+            for site, s in self._stats.items():
+                out[site] = {
+                    **s,
+                    "avg_latency_s": round(s["latency_s"] / s["calls"], 3)
+                    if s["calls"]
+                    else None,
+                }
+        return {
+            "queued": self.queue.qsize(),
+            "rpm_limit": LLM_RPM,
+            "tpm_limit": LLM_TPM,
+            "concurrency": LLM_CONCURRENCY,
+            "sites": out,
+        }
+
+    # ---------- internals ----------
+
+    def _record(self, site, **delta):
+        with self._stats_lock:
+            s = self._stats[site]
+            for k, v in delta.items():
+                if k == "max_latency_s":
+                    s[k] = max(s[k], v)
+                else:
+                    s[k] += v
+
+    async def _enqueue(self, job):
+        await self.queue.put((job["priority"], next(self._seq), job))
+
+    async def _dispatch(self):
+        # picks the most urgent job each time a slot and budget are available
+        while True:
+            _, seq, job = await self.queue.get()
+            if job["future"].done():
+                # the caller gave up while it was queued
+                self._record(job["site"], cancelled=1)
+                continue
+            est = estimate_tokens(job["messages"], job["max_tokens"])
+
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(est))
+            if wait > 0:
+                # put it back so anything more urgent that arrives meanwhile goes first
+                await self.queue.put((job["priority"], seq, job))
+                await asyncio.sleep(min(wait, 0.5))
+                continue
+
+            await self.slots.acquire()
+            if job["future"].done():
+                # cancelled while it waited for a slot
+                self.slots.release()
+                self._record(job["site"], cancelled=1)
+                continue
+            self.requests.take(1)
+            self.tokens.take(est)
+            job["estimate"] = est
+            self.loop.create_task(self._call(job))
+
+    async def _call(self, job):
+        import groq
+
+        site = job["site"]
+        started = time.monotonic()
+        if job["attempt"] == 0:
+            self._record(site, queue_wait_s=started - job["queued_at"])
+
+        try:
+            kwargs = {
+                "model": job["model"],
+                "temperature": job["temperature"],
+                "messages": job["messages"],
+            }
+            if job["max_tokens"] is not None:
+                kwargs["max_tokens"] = job["max_tokens"]
+
+            resp = await get_async_groq_client().chat.completions.create(**kwargs)
+
+        except (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError) as e:
+            self.slots.release()
+            if job["attempt"] >= LLM_MAX_RETRIES:
+                self._record(site, errors=1)
+                _settle(job, exc=e)
+                return
+
+            delay = _retry_delay(job["attempt"], e)
+            if isinstance(e, groq.RateLimitError):
+                self.requests.drain(delay)
+            job["attempt"] += 1
+            self._record(site, retries=1)
+            print(f"[warn] LLM {site} retry {job['attempt']} in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            await self._enqueue(job)
+            return
+
+        except Exception as e:
+            self.slots.release()
+            self._record(site, errors=1)
+            _settle(job, exc=e)
+            return
+
+        self.slots.release()
+        latency = time.monotonic() - started
+
+        usage = getattr(resp, "usage", None)
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        if usage is not None:
+            # settle the estimate against what the call really used
+            self.tokens.take(prompt + completion - job["estimate"])
+
+        self._record(
+            site,
+            calls=1,
+            prompt_tokens=prompt,
+            completion_tokens=completion,
+            latency_s=latency,
+            max_latency_s=latency,
+        )
+        _settle(job, result=resp.choices[0].message.content)
+
+
+def _settle(job, result=None, exc=None):
+    # a caller that timed out has cancelled the future already
+    fut = job["future"]
+    if fut.done():
+        return
+    if exc is not None:
+        fut.set_exception(exc)
+    else:
+        fut.set_result(result)
+
+
+def _retry_delay(attempt: int, exc) -> float:
+    resp = getattr(exc, "response", None)
+    retry_after = resp.headers.get("retry-after") if resp is not None else None
+    try:
+        if retry_after:
+            return min(float(retry_after), 60.0)
+    except ValueError:
+        pass
+    return random.uniform(0, min(60.0, 1.0 * 2**attempt))
+
+
+@resource("llm_scheduler")
+def get_llm_scheduler() -> LLMScheduler:
+    return LLMScheduler()
+
+
+def complete(messages, model, temperature=0, max_tokens=None, priority=INGEST, site="unknown"):
+    return get_llm_scheduler().complete(
+        messages,
+        model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        priority=priority,
+        site=site,
+    )
+
+
+def llm_stats() -> dict:
+    return get_llm_scheduler().stats()
@@ -1,8 +1,28 @@
-from sentence_transformers import SentenceTransformer
-from functools import lru_cache
+import os
 
+from app.registry import resource
 
-@lru_cache(maxsize=1)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+# "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime export)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+
+# embedding cache key: quantized vectors are close to, not equal to, torch's
+EMBEDDING_MODEL_KEY = (
+    EMBEDDING_MODEL if EMBEDDING_BACKEND == "torch" else f"{EMBEDDING_MODEL}:onnx-int8"
+)
+
+
+@resource("embedding_model")
 def get_embedding_model():
-    print("Loading embedding model ONCE...")
-    return SentenceTransformer("all-MiniLM-L6-v2")
+    print(f"Loading embedding model ONCE ({EMBEDDING_BACKEND})...")
+
+    if EMBEDDING_BACKEND == "onnx":
+        from app.ai.onnx_embedder import OnnxEmbedder
+
+        return OnnxEmbedder()
+
+    # imported here so processes that only hit the embedding cache never load torch
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(EMBEDDING_MODEL)
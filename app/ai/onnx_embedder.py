@@ -0,0 +1,113 @@
+"""
+int8-quantized ONNX Runtime version of the sentence-transformers MiniLM
+model. Produces the same mean-pooled, L2-normalized vectors as
+SentenceTransformer.encode without importing torch at runtime.
+
+Export once (needs torch + sentence-transformers + onnxruntime):
+
+    python -m app.ai.onnx_embedder export [out_dir]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", ".cache/onnx/all-MiniLM-L6-v2")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # 0 = onnxruntime default
+MAX_SEQ_LENGTH = 256
+BATCH_SIZE = 32
+
+MODEL_FILE = "model.int8.onnx"
+
+
+class OnnxEmbedder:
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        path = os.path.join(model_dir, MODEL_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"{path} missing; run `python -m app.ai.onnx_embedder export`"
+            )
+
+        opts = ort.SessionOptions()
+        if ONNX_THREADS:
+            opts.intra_op_num_threads = ONNX_THREADS
+        self.session = ort.InferenceSession(
+            path, opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def encode(self, texts, normalize_embeddings: bool = True, batch_size=BATCH_SIZE):
+        if isinstance(texts, str):
+            return self.encode([texts], normalize_embeddings, batch_size)[0]
+
+        out = []
+        for i in range(0, len(texts), batch_size):
+            enc = self.tokenizer.encode_batch(list(texts[i : i + batch_size]))
+            ids = np.array([e.ids for e in enc], dtype=np.int64)
+            mask = np.array([e.attention_mask for e in enc], dtype=np.int64)
+
+            feeds = {"input_ids": ids, "attention_mask": mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.zeros_like(ids)
+
+            hidden = self.session.run(None, feeds)[0]  # (batch, seq, dim)
+
+            # mean pooling over real tokens, as sentence-transformers does
+            m = mask[..., None].astype(np.float32)
+            pooled = (hidden * m).sum(axis=1) / np.clip(m.sum(axis=1), 1e-9, None)
+            out.append(pooled.astype(np.float32))
+
+        vecs = np.vstack(out) if out else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings and len(vecs):
+            vecs /= np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
+        return vecs
+
+
+def export(out_dir: str = ONNX_MODEL_DIR):
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    from app.ai.model_store import EMBEDDING_MODEL
+
+    os.makedirs(out_dir, exist_ok=True)
+    st = SentenceTransformer(EMBEDDING_MODEL, device="cpu")
+    transformer = st[0].auto_model.eval()
+    st.tokenizer.save_pretrained(out_dir)  # writes tokenizer.json
+
+    sample = st.tokenizer(["export sample"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    axes = {n: {0: "batch", 1: "seq"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[n] for n in names),
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=17,
+        )
+
+    quantize_dynamic(
+        fp32_path, os.path.join(out_dir, MODEL_FILE), weight_type=QuantType.QInt8
+    )
+    print(f"wrote {os.path.join(out_dir, MODEL_FILE)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "export":
+        export(*sys.argv[2:3])
+    else:
+        print(__doc__)
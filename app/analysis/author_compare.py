@@ -18,9 +18,7 @@ def get_author_topics(rows):
 
 import numpy as np
 
-from app.ai.model_store import get_embedding_model
-
-_model = get_embedding_model()
+from app.ai.embeddings import embed_matrix
 
 
 def _cosine_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
@@ -47,8 +45,8 @@ def compare_topics(a_topics: set[str], b_topics: set[str], threshold: float = 0.
             "unique_to_b": b_list,
         }
 
-    a_emb = np.asarray(_model.encode(a_list))
-    b_emb = np.asarray(_model.encode(b_list))
+    a_emb = embed_matrix(a_list)
+    b_emb = embed_matrix(b_list)
 
     sims = _cosine_matrix(a_emb, b_emb)
 
@@ -116,8 +114,8 @@ def disagreement(claims_a, claims_b, sim_threshold=0.78):
     if not claims_a or not claims_b:
         return []
 
-    a_emb = np.asarray(_model.encode(claims_a))
-    b_emb = np.asarray(_model.encode(claims_b))
+    a_emb = embed_matrix(claims_a)
+    b_emb = embed_matrix(claims_b)
 
     sims = _cosine_matrix(a_emb, b_emb)
 
@@ -1,8 +1,7 @@
-from groq import Groq
+from app.ai.llm import BACKFILL, complete
 import os
 import json
 
-client = Groq(api_key=os.environ["GROQ_API_KEY"])
 
 PROMPT = """
 You are summarizing a thinker's worldview.
@@ -29,7 +28,7 @@ Return JSON:
 
 
 def build_author_summary(beliefs, topics, bias):
-    r = client.chat.completions.create(
+    raw = complete(
         model=os.getenv("GROQ_MODEL"),
         temperature=0.2,
         messages=[
@@ -42,10 +41,10 @@ def build_author_summary(beliefs, topics, bias):
                 ),
             }
         ],
+        priority=BACKFILL,
+        site="author_summary",
     )
 
-    raw = r.choices[0].message.content
-
     try:
         return json.loads(raw)["summary"]
     except:
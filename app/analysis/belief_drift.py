@@ -1,17 +1,84 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 from sqlalchemy import text
-from app.analysis.belief_relations import classify_relation
+from app.db.bulk import insert_rows
+from app.analysis.belief_relations import (
+    RELATION_PARALLEL,
+    classify_relation,
+    load_claim_vectors,
+)
+
+DRIFT_TOP_K = int(os.getenv("DRIFT_TOP_K", "5"))
+DRIFT_MIN_SIM = float(os.getenv("DRIFT_MIN_SIM", "0.5"))
+DRIFT_BLOCK = int(os.getenv("DRIFT_BLOCK", "1024"))  # new claims compared per matmul
+WRITE_EVERY = 50
+
+
+def new_claim_pairs(
+    X,
+    new_idx,
+    top_k: int = DRIFT_TOP_K,
+    min_sim: float = DRIFT_MIN_SIM,
+    block: int = DRIFT_BLOCK,
+):
+    """
+    ((i, j), similarity) with i < j for every new row i (index in new_idx)
+    and each of its top_k most similar rows j at cosine >= min_sim. Only
+    new rows are compared, in float32 blocks against all rows, so memory is
+    O(block * n) and an update with few new claims costs O(new * n).
+    """
+    n = len(X)
+    if n < 2 or not len(new_idx):
+        return []
+
+    X = np.asarray(X, dtype=np.float32)
+    X = X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-12)
+    k = min(top_k, n - 1)
+
+    pairs = {}
+    for start in range(0, len(new_idx), block):
+        rows = np.asarray(new_idx[start : start + block])
+        sim = X[rows] @ X.T
+        sim[np.arange(len(rows)), rows] = -np.inf
+        nearest = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+        for r, i in enumerate(rows):
+            for j in nearest[r]:
+                if sim[r, j] >= min_sim:
+                    pairs[(min(int(i), int(j)), max(int(i), int(j)))] = float(sim[r, j])
+    return sorted(pairs.items())
 
 
-def detect_belief_changes(engine, author_id):
+def update_belief_changes(
+    engine, author_id, top_k: int = DRIFT_TOP_K, min_sim: float = DRIFT_MIN_SIM
+):
+    """
+    Compares claims that are new since the last run against the author's
+    other claims and stores every classified pair in belief_changes.
 
+    Only semantically near pairs (a new claim's top_k neighbours above
+    min_sim) with a strict first_seen ordering are sent to the LLM; pairs
+    already stored are never reclassified.
+    """
     with engine.begin() as conn:
+        run_id = conn.execute(
+            text("insert into belief_change_runs (author_id) values (:a) returning id"),
+            {"a": author_id},
+        ).scalar_one()
+
         beliefs = (
             conn.execute(
                 text("""
-            select canonical_claim, min(occurred_at) first_seen, max(occurred_at) last_seen
-            from belief_timeline
-            where author_id=:a
-            group by canonical_claim
+            select t.canonical_claim as claim,
+                   min(t.occurred_at) as first_seen,
+                   bool_or(s.claim is null) as is_new
+            from belief_timeline t
+            left join belief_change_claims s
+              on s.author_id = t.author_id and s.claim = t.canonical_claim
+            where t.author_id = :a
+            group by t.canonical_claim
+            order by t.canonical_claim
         """),
                 {"a": author_id},
             )
@@ -19,18 +86,138 @@ def detect_belief_changes(engine, author_id):
             .all()
         )
 
-    changes = []
-
-    for i, a in enumerate(beliefs):
-        for b in beliefs[i + 1 :]:
-            rel = classify_relation(a["canonical_claim"], b["canonical_claim"])
-            if rel["relation"] == "CONTRADICTS":
-                changes.append(
-                    {
-                        "earlier": a["canonical_claim"],
-                        "later": b["canonical_claim"],
-                        "confidence": rel["confidence"],
-                    }
+        existing = {
+            (r[0], r[1])
+            for r in conn.execute(
+                text("select earlier, later from belief_changes where author_id = :a"),
+                {"a": author_id},
+            )
+        }
+
+    new = [b for b in beliefs if b["is_new"]]
+    todo = []
+
+    if new and len(beliefs) > 1:
+        claims = [b["claim"] for b in beliefs]
+        X = load_claim_vectors(engine, author_id, claims)
+        new_idx = [i for i, b in enumerate(beliefs) if b["is_new"]]
+
+        for (i, j), sim in new_claim_pairs(X, new_idx, top_k, min_sim):
+            a, b = beliefs[i], beliefs[j]
+            if a["first_seen"] is None or b["first_seen"] is None:
+                continue
+            if a["first_seen"] == b["first_seen"]:
+                continue  # same post: not a change over time
+            if a["first_seen"] > b["first_seen"]:
+                a, b = b, a
+            if (a["claim"], b["claim"]) in existing:
+                continue
+            todo.append((a, b, sim))
+
+    found = 0
+    buffer = []
+
+    def flush():
+        if buffer:
+            with engine.begin() as conn:
+                insert_rows(
+                    conn,
+                    "belief_changes",
+                    list(buffer[0]),
+                    buffer,
+                    on_conflict="on conflict (author_id, earlier, later) do nothing",
                 )
+            buffer.clear()
+
+    with ThreadPoolExecutor(max_workers=RELATION_PARALLEL) as pool:
+        results = pool.map(lambda p: classify_relation(p[0]["claim"], p[1]["claim"]), todo)
+        for (a, b, sim), rel in zip(todo, results):
+            found += rel["relation"] == "CONTRADICTS"
+            buffer.append(
+                {
+                    "author_id": author_id,
+                    "earlier": a["claim"],
+                    "later": b["claim"],
+                    "earlier_seen": a["first_seen"],
+                    "later_seen": b["first_seen"],
+                    "relation": rel["relation"],
+                    "confidence": rel["confidence"],
+                    "similarity": sim,
+                }
+            )
+            if len(buffer) >= WRITE_EVERY:
+                flush()
+    flush()
+
+    # mark claims as compared only once their pairs are stored
+    with engine.begin() as conn:
+        if new:
+            insert_rows(
+                conn,
+                "belief_change_claims",
+                ["author_id", "claim", "first_seen"],
+                [
+                    {"author_id": author_id, "claim": b["claim"], "first_seen": b["first_seen"]}
+                    for b in new
+                ],
+                on_conflict="on conflict (author_id, claim) do nothing",
+            )
+        conn.execute(
+            text("""
+            update belief_change_runs
+            set finished_at = now(),
+                new_claims = :new,
+                pairs_checked = :checked,
+                changes_found = :found
+            where id = :id
+        """),
+            {"id": run_id, "new": len(new), "checked": len(todo), "found": found},
+        )
+
+    return {
+        "claims": len(beliefs),
+        "new_claims": len(new),
+        "pairs_checked": len(todo),
+        "changes_found": found,
+    }
+
+
+def get_belief_changes(engine, author_id, min_confidence: float = 0.0):
+    with engine.begin() as conn:
+        rows = (
+            conn.execute(
+                text("""
+            select earlier, later, earlier_seen, later_seen, confidence
+            from belief_changes
+            where author_id = :a
+              and relation = 'CONTRADICTS'
+              and coalesce(confidence, 0) >= :min_conf
+            order by later_seen desc
+        """),
+                {"a": author_id, "min_conf": min_confidence},
+            )
+            .mappings()
+            .all()
+        )
+
+    return [dict(r) for r in rows]
+
+
+def last_belief_change_run(engine, author_id):
+    with engine.begin() as conn:
+        row = (
+            conn.execute(
+                text("""
+            select started_at, finished_at, new_claims, pairs_checked, changes_found
+            from belief_change_runs
+            where author_id = :a
+            order by started_at desc
+            limit 1
+        """),
+                {"a": author_id},
+            )
+            .mappings()
+            .first()
+        )
 
-    return changes
+    return dict(row) if row else None
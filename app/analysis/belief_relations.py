@@ -1,9 +1,15 @@
-from groq import Groq
+from app.ai.llm import BACKFILL, complete
 import os
 import json
-import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+RELATION_TOP_K = int(os.getenv("RELATION_TOP_K", "5"))
+RELATION_MIN_SIM = float(os.getenv("RELATION_MIN_SIM", "0.45"))
+RELATION_PARALLEL = int(os.getenv("RELATION_PARALLEL", "4"))
+WRITE_EVERY = 50
 
-client = Groq(api_key=os.environ["GROQ_API_KEY"])
 
 PROMPT = """
 Determine the logical relationship between two beliefs held by the same author.
@@ -24,13 +30,13 @@ Belief B:
 
 
 def classify_relation(a, b):
-    r = client.chat.completions.create(
+    raw = complete(
         model=os.getenv("GROQ_MODEL"),
         temperature=0,
         messages=[{"role": "user", "content": PROMPT.format(a=a, b=b)}],
-    )
-
-    raw = r.choices[0].message.content.strip()
+        priority=BACKFILL,
+        site="classify_relation",
+    ).strip()
 
     try:
         parsed = json.loads(raw)
@@ -42,17 +48,79 @@ def classify_relation(a, b):
         return {"relation": "UNRELATED", "confidence": 0.5}
 
 
-def build_relations(engine, author_id):
+def candidate_pairs(X: np.ndarray, top_k: int = RELATION_TOP_K, min_sim: float = RELATION_MIN_SIM):
+    """
+    Index pairs (i, j), i < j, where j is among i's top_k most similar rows
+    (or vice versa) and cosine similarity is at least min_sim.
+    """
+    n = len(X)
+    if n < 2:
+        return []
+
+    X = X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-12)
+    sim = X @ X.T
+    np.fill_diagonal(sim, -np.inf)
+
+    k = min(top_k, n - 1)
+    nearest = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+
+    pairs = set()
+    for i in range(n):
+        for j in nearest[i]:
+            if sim[i, j] >= min_sim:
+                pairs.add((min(i, int(j)), max(i, int(j))))
+    return sorted(pairs)
+
+
+def load_claim_vectors(engine, author_id, claims: list[str]) -> np.ndarray:
+    """
+    One row per claim. Canonical claims are the text of one of their
+    occurrences, so this reuses that occurrence's stored embedding and only
+    embeds claims with none.
+    """
+    from sqlalchemy import text
+
+    from app.ai.embeddings import embed_matrix
+    from app.db.vectors import binary, from_db
+
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text(f"""
+            select distinct on (claim) claim, {binary("embedding")} as embedding
+            from belief_occurrences
+            where author_id = :a
+              and claim = any(:claims)
+              and embedding is not null
+            order by claim
+        """),
+            {"a": author_id, "claims": list(claims)},
+        ).all()
+
+    stored = {claim: from_db(emb) for claim, emb in rows}
+    vectors = [stored.get(c) for c in claims]
+
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        for i, v in zip(missing, embed_matrix([claims[i] for i in missing])):
+            vectors[i] = v
+
+    return np.vstack(vectors).astype(np.float32, copy=False)
+
+
+def build_relations(engine, author_id, top_k: int = RELATION_TOP_K, min_sim: float = RELATION_MIN_SIM):
 
     from sqlalchemy import text
 
+    from app.db.bulk import insert_rows
+
     with engine.begin() as conn:
-        beliefs = (
+        claims = (
             conn.execute(
                 text("""
-            select canonical_claim
+            select distinct canonical_claim
             from author_beliefs
-            where author_id=:a
+            where author_id = :a
+            order by canonical_claim
         """),
                 {"a": author_id},
             )
@@ -60,29 +128,67 @@ def build_relations(engine, author_id):
             .all()
         )
 
-    pairs = list(itertools.combinations(beliefs, 2))
+        existing = {
+            frozenset((r[0], r[1]))
+            for r in conn.execute(
+                text("""
+            select belief_a, belief_b
+            from belief_relations
+            where author_id = :a
+        """),
+                {"a": author_id},
+            )
+        }
 
-    inserted = 0
+    if len(claims) < 2:
+        return {
+            "relations": 0,
+            "beliefs": len(claims),
+            "candidates": 0,
+            "skipped_existing": 0,
+            "all_pairs": 0,
+        }
 
-    for a, b in pairs:
-        rel = classify_relation(a, b)
+    X = load_claim_vectors(engine, author_id, claims)
+    pairs = candidate_pairs(X, top_k, min_sim)
+    todo = [(claims[i], claims[j]) for i, j in pairs if frozenset((claims[i], claims[j])) not in existing]
 
-        with engine.begin() as conn:
-            conn.execute(
-                text("""
-                insert into belief_relations
-                (author_id, belief_a, belief_b, relation, confidence)
-                values (:a,:ba,:bb,:r,:c)
-            """),
+    inserted = 0
+    buffer = []
+
+    def flush():
+        nonlocal inserted
+        if buffer:
+            with engine.begin() as conn:
+                insert_rows(
+                    conn,
+                    "belief_relations",
+                    ["author_id", "belief_a", "belief_b", "relation", "confidence"],
+                    buffer,
+                )
+            inserted += len(buffer)
+            buffer.clear()
+
+    # calls run concurrently; the LLM scheduler enforces rate limits
+    with ThreadPoolExecutor(max_workers=RELATION_PARALLEL) as pool:
+        for (a, b), rel in zip(todo, pool.map(lambda p: classify_relation(*p), todo)):
+            buffer.append(
                 {
-                    "a": author_id,
-                    "ba": a,
-                    "bb": b,
-                    "r": rel["relation"],
-                    "c": rel["confidence"],
-                },
+                    "author_id": author_id,
+                    "belief_a": a,
+                    "belief_b": b,
+                    "relation": rel["relation"],
+                    "confidence": rel["confidence"],
+                }
             )
-
-        inserted += 1
-
-    return {"relations": inserted}
+            if len(buffer) >= WRITE_EVERY:
+                flush()
+    flush()
+
+    return {
+        "relations": inserted,
+        "beliefs": len(claims),
+        "candidates": len(pairs),
+        "skipped_existing": len(pairs) - len(todo),
+        "all_pairs": len(claims) * (len(claims) - 1) // 2,
+    }
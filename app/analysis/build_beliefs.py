@@ -1,93 +1,221 @@
+import os
+
 import numpy as np
 from sqlalchemy import text
-from sklearn.metrics.pairwise import cosine_similarity
-
-
-def parse_pgvector(v):
-    if isinstance(v, list):
-        return np.array(v, dtype=float)
-    if isinstance(v, str):
-        return np.fromstring(v.strip("[]"), sep=",")
-    raise ValueError("Unknown vector format")
 
-
-def build_author_beliefs(engine, author_id):
-
-    # ---------- load claim embeddings ----------
+from app.db.bulk import insert_rows, update_rows
+from app.db.vectors import binary, fetch_matrix, stack, to_db
+
+THRESH = 0.72  # belief similarity threshold
+BLOCK = int(os.getenv("BELIEF_BLOCK", "2048"))  # claims compared per matmul
+
+
+def _normalize(X):
+    return X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-12)
+
+
+def assign_claims(
+    X: np.ndarray,
+    centroids: np.ndarray | None = None,
+    counts: np.ndarray | None = None,
+    thresh: float = THRESH,
+    block: int = BLOCK,
+):
+    """
+    Greedy semantic grouping in float32 blocks.
+
+    Each row of X joins the most similar existing centroid if that
+    similarity is >= thresh; otherwise rows are grouped leader-first, as
+    before: the first unassigned row starts a belief and takes every later
+    row in the block within thresh of it. Centroids are the running mean of
+    their members' unit vectors.
+
+    Returns (labels, centroids, counts); labels index into the returned
+    centroids, and new beliefs are appended after the existing ones.
+    Memory is O(block * beliefs), never O(n^2).
+    """
+    X = _normalize(np.asarray(X, dtype=np.float32))
+    dim = X.shape[1]
+
+    if centroids is None or len(centroids) == 0:
+        sums = np.zeros((0, dim), dtype=np.float32)
+        counts = np.zeros(0, dtype=np.int64)
+    else:
+        counts = np.asarray(counts, dtype=np.int64).copy()
+        sums = _normalize(np.asarray(centroids, dtype=np.float32)) * counts[:, None]
+
+    labels = np.full(len(X), -1, dtype=np.int64)
+
+    for start in range(0, len(X), block):
+        B = X[start : start + block]
+        lab = np.full(len(B), -1, dtype=np.int64)
+
+        if len(sums):
+            sim = B @ _normalize(sums).T
+            best = sim.argmax(axis=1)
+            hit = sim[np.arange(len(B)), best] >= thresh
+            lab[hit] = best[hit]
+
+        # leftovers: leader clustering inside the block
+        rest = np.flatnonzero(lab < 0)
+        new_leaders = []
+        while len(rest):
+            leader = rest[0]
+            members = rest[(B[rest] @ B[leader]) >= thresh]
+            lab[members] = len(sums) + len(new_leaders)
+            new_leaders.append(leader)
+            rest = rest[lab[rest] < 0]
+
+        if new_leaders:
+            sums = np.vstack([sums, np.zeros((len(new_leaders), dim), dtype=np.float32)])
+            counts = np.concatenate([counts, np.zeros(len(new_leaders), dtype=np.int64)])
+
+        np.add.at(sums, lab, B)
+        counts += np.bincount(lab, minlength=len(counts))
+        labels[start : start + len(B)] = lab
+
+    return labels, _normalize(sums) if len(sums) else sums, counts
+
+
+def _load_unassigned(conn, author_id):
+    return fetch_matrix(
+        conn,
+        text(f"""
+            select id, claim, polarity, confidence, {binary("embedding")} as embedding
+            from belief_occurrences
+            where author_id = :author_id
+            and embedding is not null
+            and claim_type = 'ADVANCED'
+            and belief_id is null
+            order by occurred_at, id
+        """),
+        {"author_id": author_id},
+    )
+
+
+def build_author_beliefs(engine, author_id, rebuild: bool = False):
+    """
+    Assigns claims without a belief to the author's existing beliefs
+    (updating support counts, averages and centroids in place) and creates
+    new beliefs for the rest. rebuild=True reclusters every claim from
+    scratch, and is forced for authors whose beliefs predate centroids.
+    A belief's canonical claim is its longest member at creation time.
+    """
+    # one transaction: a rebuild that fails keeps the old beliefs
     with engine.begin() as conn:
-        rows = (
+        beliefs = (
             conn.execute(
-                text("""
-                select id, claim, polarity, confidence, embedding
-                from belief_occurrences
-                where author_id = :author_id
-                and embedding is not null
-                and claim_type = 'ADVANCED'
+                text(f"""
+                select id, support_count, avg_polarity, confidence,
+                       {binary("centroid")} as centroid
+                from author_beliefs
+                where author_id = :a
+                order by id
             """),
-                {"author_id": author_id},
+                {"a": author_id},
             )
             .mappings()
             .all()
         )
 
-    if not rows:
-        return {"beliefs": 0}
+        if any(b["centroid"] is None for b in beliefs):
+            rebuild = True
 
-    X = np.vstack([parse_pgvector(r["embedding"]) for r in rows])
+        if rebuild:
+            conn.execute(
+                text("""
+                update belief_occurrences set belief_id = null
+                where author_id = :a and belief_id is not null
+            """),
+                {"a": author_id},
+            )
+            conn.execute(
+                text("delete from author_beliefs where author_id=:a"),
+                {"a": author_id},
+            )
+            beliefs = []
 
-    # ---------- semantic grouping (NOT density clustering) ----------
-    sim = cosine_similarity(X)
+        rows, X = _load_unassigned(conn, author_id)
 
-    groups = []
-    used = set()
-    THRESH = 0.72  # belief similarity threshold
+        if not rows:
+            return {"beliefs": len(beliefs), "assigned": 0, "new_beliefs": 0, "rebuilt": rebuild}
 
-    for i in range(len(rows)):
-        if i in used:
-            continue
+        centroids = stack(b["centroid"] for b in beliefs) if beliefs else None
+        counts = np.array([b["support_count"] for b in beliefs], dtype=np.int64)
 
-        group_idx = [i]
-        used.add(i)
+        labels, centroids, counts = assign_claims(X, centroids, counts)
 
-        for j in range(i + 1, len(rows)):
-            if j in used:
-                continue
-            if sim[i][j] >= THRESH:
-                group_idx.append(j)
-                used.add(j)
+        members = {}
+        for r, lab in zip(rows, labels):
+            members.setdefault(int(lab), []).append(r)
 
-        groups.append([rows[k] for k in group_idx])
+        belief_ids = [b["id"] for b in beliefs]
 
-    # ---------- write beliefs ----------
-    with engine.begin() as conn:
-        conn.execute(
-            text("delete from author_beliefs where author_id=:a"),
-            {"a": author_id},
+        # ---------- existing beliefs: update in place ----------
+        updates = []
+        for lab, group in members.items():
+            if lab >= len(beliefs):
+                continue
+            b = beliefs[lab]
+            old, add = b["support_count"], len(group)
+            n = old + add
+            updates.append(
+                {
+                    "id": b["id"],
+                    "support_count": n,
+                    "avg_polarity": (b["avg_polarity"] * old + sum(x["polarity"] for x in group)) / n,
+                    "confidence": (b["confidence"] * old + sum(x["confidence"] for x in group)) / n,
+                    "centroid": to_db(centroids[lab]),
+                }
+            )
+        update_rows(
+            conn,
+            "author_beliefs",
+            "id",
+            ["support_count", "avg_polarity", "confidence", "centroid"],
+            updates,
+            casts={"centroid": "vector", "avg_polarity": "real", "confidence": "real"},
         )
 
-        inserted = 0
-
-        for group in groups:
-            canonical = max(group, key=lambda x: len(x["claim"]))["claim"]
+        # ---------- new beliefs ----------
+        created = []
+        for lab in range(len(beliefs), len(centroids)):
+            group = members[lab]
             support = len(group)
-            polarity = sum(x["polarity"] for x in group) / support
-            confidence = sum(x["confidence"] for x in group) / support
-
-            conn.execute(
-                text("""
-                    insert into author_beliefs
-                    (author_id, canonical_claim, support_count, avg_polarity, confidence)
-                    values (:a,:c,:s,:p,:conf)
-                """),
+            created.append(
                 {
-                    "a": author_id,
-                    "c": canonical,
-                    "s": support,
-                    "p": polarity,
-                    "conf": confidence,
-                },
+                    "author_id": author_id,
+                    "canonical_claim": max(group, key=lambda x: len(x["claim"]))["claim"],
+                    "support_count": support,
+                    "avg_polarity": sum(x["polarity"] for x in group) / support,
+                    "confidence": sum(x["confidence"] for x in group) / support,
+                    "centroid": to_db(centroids[lab]),
+                }
             )
+        belief_ids += insert_rows(
+            conn,
+            "author_beliefs",
+            list(created[0]) if created else [],
+            created,
+            casts={"centroid": "vector"},
+            returning="id",
+        )
 
-            inserted += 1
+        # ---------- occurrences -> belief ----------
+        update_rows(
+            conn,
+            "belief_occurrences",
+            "id",
+            ["belief_id"],
+            [
+                {"id": r["id"], "belief_id": belief_ids[int(lab)]}
+                for r, lab in zip(rows, labels)
+            ],
+        )
 
-    return {"beliefs": inserted}
+    return {
+        "beliefs": len(centroids),
+        "assigned": len(rows),
+        "new_beliefs": len(centroids) - len(beliefs),
+        "rebuilt": rebuild,
+    }
@@ -1,9 +1,8 @@
-from groq import Groq
+from app.ai.llm import BACKFILL, complete
 import os
 import json
 import re
 
-client = Groq(api_key=os.environ["GROQ_API_KEY"])
 
 PROMPT = """
 Determine how the author uses this statement.
@@ -22,13 +21,13 @@ VALID = {"ADVANCED", "DISCUSSED", "META"}
 
 
 def classify_claim(text: str) -> str:
-    r = client.chat.completions.create(
+    raw = complete(
         model=os.getenv("GROQ_MODEL"),
         temperature=0,
         messages=[{"role": "user", "content": PROMPT + text}],
-    )
-
-    raw = r.choices[0].message.content.strip()
+        priority=BACKFILL,
+        site="classify_claim",
+    ).strip()
 
     # extract JSON block if wrapped
     match = re.search(r"\{.*\}", raw, re.DOTALL)
@@ -47,3 +46,59 @@ def classify_claim(text: str) -> str:
         return match.group(1)
 
     return "DISCUSSED"
+
+
+BATCH_PROMPT = """
+For each numbered statement, determine how the author uses it.
+
+ADVANCED = the author is proposing or arguing this idea (even tentatively)
+DISCUSSED = the author describes others' beliefs or possibilities without endorsing
+META = about the article, reactions, or writing process
+
+Return only a JSON array with one object per statement, in order:
+[{{"i":1,"type":"ADVANCED"|"DISCUSSED"|"META"}}, ...]
+
+Statements:
+{statements}
+"""
+
+
+def classify_claims_batch(texts: list[str]) -> list[str | None]:
+    """
+    One LLM call for several statements. Returns a type per input, or None
+    where the model's answer for that item was missing or invalid.
+    """
+    numbered = "\n".join(f"{i}. {t}" for i, t in enumerate(texts, start=1))
+    raw = complete(
+        model=os.getenv("GROQ_MODEL"),
+        temperature=0,
+        max_tokens=20 * len(texts) + 20,
+        messages=[{"role": "user", "content": BATCH_PROMPT.format(statements=numbered)}],
+        priority=BACKFILL,
+        site="classify_claims_batch",
+    ).strip()
+
+    results = [None] * len(texts)
+
+    match = re.search(r"\[.*\]", raw, re.DOTALL)
+    if not match:
+        return results
+    try:
+        items = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return results
+    if not isinstance(items, list):
+        return results
+
+    for pos, item in enumerate(items):
+        if not isinstance(item, dict):
+            continue
+        try:
+            idx = int(item.get("i", pos + 1)) - 1
+        except (TypeError, ValueError):
+            continue
+        t = item.get("type")
+        if 0 <= idx < len(texts) and t in VALID and results[idx] is None:
+            results[idx] = t
+
+    return results
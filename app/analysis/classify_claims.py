@@ -1,24 +1,77 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 from sqlalchemy import text
-from app.analysis.claim_filter import classify_claim
+from app.db.bulk import update_rows
+from app.analysis.claim_filter import classify_claim, classify_claims_batch
+
+CLAIM_BATCH = int(os.getenv("CLAIM_BATCH", "25"))  # claims per prompt
+CLAIM_PARALLEL = int(os.getenv("CLAIM_PARALLEL", "4"))  # prompts in flight
+RETRY_ROUNDS = 2  # batch retries for failed items before going one by one
+
+
+def _classify(texts: list[str], batch_size: int, stats) -> list[str]:
+    """
+    Classifies `texts` in prompts of `batch_size`, re-queueing only the
+    items whose answers failed validation. Whatever still fails after
+    RETRY_ROUNDS falls back to the single-claim prompt.
+    """
+    results = [None] * len(texts)
+    pending = list(range(len(texts)))
+    size = batch_size
+
+    with ThreadPoolExecutor(max_workers=CLAIM_PARALLEL) as pool:
+        for round_ in range(RETRY_ROUNDS + 1):
+            if not pending:
+                break
+            if round_:
+                stats["requeued"] += len(pending)
+
+            groups = [pending[i : i + size] for i in range(0, len(pending), size)]
+            answers = pool.map(
+                lambda g: classify_claims_batch([texts[i] for i in g]), groups
+            )
 
-BATCH = 20  # keep small so you don't rate-limit
+            failed = []
+            for group, got in zip(groups, answers):
+                stats["llm_calls"] += 1
+                for i, t in zip(group, got):
+                    if t is None:
+                        failed.append(i)
+                    else:
+                        results[i] = t
 
+            pending = failed
+            size = max(1, size // 2)  # smaller prompts fail less often
 
-def classify_missing_claims(engine):
+        for i, t in zip(pending, pool.map(lambda i: classify_claim(texts[i]), pending)):
+            stats["llm_calls"] += 1
+            stats["single_fallback"] += 1
+            results[i] = t
 
-    updated = 0
+    return results
+
+
+def classify_missing_claims(engine, batch_size: int = CLAIM_BATCH):
+
+    stats = {"classified": 0, "llm_calls": 0, "requeued": 0, "single_fallback": 0}
+    page = max(1, batch_size) * CLAIM_PARALLEL
+    after = None
 
     while True:
+        # keyset paging by id so each round reads a fresh, ordered slice
         with engine.begin() as conn:
             rows = (
                 conn.execute(
-                    text("""
+                    text(f"""
                 select id, claim
                 from belief_occurrences
                 where claim_type is null
-                limit :batch
+                {"and id > :after" if after is not None else ""}
+                order by id
+                limit :page
             """),
-                    {"batch": BATCH},
+                    {"after": after, "page": page},
                 )
                 .mappings()
                 .all()
@@ -26,21 +79,25 @@ def classify_missing_claims(engine):
 
         if not rows:
             break
+        after = rows[-1]["id"]
 
-        for r in rows:
-            ctype = classify_claim(r["claim"])
+        types = _classify([r["claim"] for r in rows], max(1, batch_size), stats)
 
-            with engine.begin() as conn:
-                conn.execute(
-                    text("""
-                    update belief_occurrences
-                    set claim_type = :ctype
-                    where id = :id
-                """),
-                    {"ctype": ctype, "id": r["id"]},
-                )
+        # one statement for the whole page
+        with engine.begin() as conn:
+            update_rows(
+                conn,
+                "belief_occurrences",
+                "id",
+                ["claim_type"],
+                [{"id": r["id"], "claim_type": t} for r, t in zip(rows, types)],
+                batch_size=page,
+            )
 
-            updated += 1
-            print("classified:", r["id"], ctype)
+        stats["classified"] += len(rows)
+        print(f"classified {len(rows)} claims up to id {after}")
 
-    return {"classified": updated}
+    stats["claims_per_call"] = (
+        round(stats["classified"] / stats["llm_calls"], 2) if stats["llm_calls"] else None
+    )
+    return stats
@@ -1,4 +1,6 @@
-from app.ai.embeddings import embed_texts
+from app.ai.embeddings import embed_matrix
+from app.db.bulk import update_rows
+from app.db.vectors import to_db
 from sqlalchemy import text
 
 
@@ -17,17 +19,16 @@ def embed_missing_claims(engine):
     ids = [r[0] for r in rows]
     texts = [r[1] for r in rows]
 
-    vectors = embed_texts(texts)
+    vectors = embed_matrix(texts)
 
     with engine.begin() as conn:
-        for i, vec in zip(ids, vectors):
-            conn.execute(
-                text("""
-                update belief_occurrences
-                set embedding = :vec
-                where id = :id
-            """),
-                {"vec": vec, "id": i},
-            )
+        update_rows(
+            conn,
+            "belief_occurrences",
+            "id",
+            ["embedding"],
+            [{"id": i, "embedding": to_db(vec)} for i, vec in zip(ids, vectors)],
+            casts={"embedding": "vector"},
+        )
 
     return len(rows)
@@ -0,0 +1,69 @@
+from app.ai.groq_analysis import MODEL, PROMPT_VERSION, analyze_article, article_prompt_hash
+from app.ai.llm import BACKFILL
+from app.analysis.claim_extractor import extract_claims
+from app.db.queries import (
+    find_analysis_by_hash,
+    insert_analysis,
+    list_posts_needing_analysis,
+    replace_belief_occurrences,
+)
+
+
+def reanalyze_stale_posts(engine, author_id=None, limit: int = 20):
+    """
+    Brings up to `limit` posts to the current MODEL/PROMPT_VERSION, oldest
+    first. Call repeatedly to spread a version bump over time. Posts whose
+    prompt_hash already has a stored analysis are fixed without an LLM call.
+    """
+    rows = list_posts_needing_analysis(
+        engine, MODEL, PROMPT_VERSION, author_id=author_id, limit=limit
+    )
+
+    llm_calls = 0
+    reused = 0
+    errors = 0
+
+    def count_call():
+        # repairs included
+        nonlocal llm_calls
+        llm_calls += 1
+
+    for r in rows:
+        try:
+            phash = article_prompt_hash(r["clean_text"])
+            stored = find_analysis_by_hash(engine, phash, r["post_id"])
+
+            if stored:
+                analysis, model = stored, stored["model"]
+                reused += 1
+            else:
+                # batch work: queued behind interactive calls and ingestion
+                analysis, model, phash = analyze_article(
+                    r["clean_text"], priority=BACKFILL, on_call=count_call
+                )
+
+            insert_analysis(
+                engine, r["post_id"], analysis, model, phash, prompt_version=PROMPT_VERSION
+            )
+
+            # only a fresh analysis changes the post's claims
+            if not stored or stored["post_id"] != r["post_id"]:
+                replace_belief_occurrences(
+                    engine,
+                    r["author_id"],
+                    r["post_id"],
+                    r["published_at"],
+                    extract_claims(analysis),
+                )
+        except Exception as e:
+            errors += 1
+            print(f"[error] reanalysis failed for post {r['post_id']}: {e}")
+
+    return {
+        "model": MODEL,
+        "prompt_version": PROMPT_VERSION,
+        "posts": len(rows),
+        "llm_calls": llm_calls,
+        "reused_analysis": reused,
+        "errors": errors,
+    }
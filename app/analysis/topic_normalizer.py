@@ -1,7 +1,6 @@
-from sentence_transformers import SentenceTransformer
 import numpy as np
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from app.ai.embeddings import embed_matrix
 
 SIM_THRESHOLD = 0.78
 
@@ -18,7 +17,7 @@ def normalize_topics(topics: list[str]) -> set[str]:
     if not topics:
         return set()
 
-    embeddings = model.encode(topics)
+    embeddings = embed_matrix(topics)
     clusters = []
 
     for topic, emb in zip(topics, embeddings):
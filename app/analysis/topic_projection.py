@@ -1,8 +1,7 @@
 import numpy as np
 
-from app.ai.model_store import get_embedding_model
-
-_model = get_embedding_model()
+from app.ai.embeddings import embed_matrix
+from app.registry import resource
 
 # anchor domains — shared intellectual space
 ANCHORS = [
@@ -20,20 +19,24 @@ ANCHORS = [
     "epistemology",
 ]
 
-_anchor_emb = _model.encode(ANCHORS)
+
+@resource("anchor_embeddings")
+def get_anchor_embeddings():
+    return embed_matrix(ANCHORS)
 
 
 def project_to_domains(topics: list[str], threshold=0.55):
     if not topics:
         return set()
 
-    emb = _model.encode(topics)
+    emb = embed_matrix(topics)
+    anchor_emb = get_anchor_embeddings()
 
     result = set()
 
     for t, vec in zip(topics, emb):
-        sims = np.dot(_anchor_emb, vec) / (
-            np.linalg.norm(_anchor_emb, axis=1) * np.linalg.norm(vec) + 1e-9
+        sims = np.dot(anchor_emb, vec) / (
+            np.linalg.norm(anchor_emb, axis=1) * np.linalg.norm(vec) + 1e-9
         )
 
         best = sims.argmax()
@@ -0,0 +1,98 @@
+"""
+Batched writes: one multi-row statement per `batch_size` rows instead of
+one round trip per row.
+
+    insert_rows(conn, "post_chunks", ["post_id", "embedding"], rows,
+                casts={"embedding": "vector"})
+    update_rows(conn, "belief_occurrences", "id", ["embedding"], rows,
+                casts={"embedding": "vector"})
+
+Rows are dicts keyed by column name. `casts` wraps a column's
+placeholders in cast(... as <type>), which VALUES lists need for any type
+psycopg2 can't infer (vector, timestamptz from strings, ...).
+"""
+
+import os
+
+from sqlalchemy import text
+
+BULK_BATCH = int(os.getenv("DB_BULK_BATCH", "500"))
+
+
+def _batches(rows, size):
+    size = max(1, size)
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def _values(columns, batch, casts):
+    """VALUES tuples with numbered placeholders, plus their parameters."""
+    tuples = []
+    params = {}
+    for n, row in enumerate(batch):
+        slots = []
+        for c in columns:
+            key = f"{c}_{n}"
+            params[key] = row[c]
+            slots.append(f"cast(:{key} as {casts[c]})" if c in casts else f":{key}")
+        tuples.append("(" + ", ".join(slots) + ")")
+    return ",\n".join(tuples), params
+
+
+def insert_rows(
+    conn,
+    table: str,
+    columns: list[str],
+    rows: list[dict],
+    casts: dict | None = None,
+    on_conflict: str = "",
+    returning: str | None = None,
+    batch_size: int = BULK_BATCH,
+):
+    """
+    Multi-row INSERT. `on_conflict` is appended verbatim (e.g. "on conflict
+    (id) do nothing"). With `returning`, returns that column for every
+    inserted row, in input order; several comma-separated columns come back
+    as tuples.
+    """
+    casts = casts or {}
+    out = []
+    for batch in _batches(rows, batch_size):
+        values, params = _values(columns, batch, casts)
+        q = f"insert into {table} ({', '.join(columns)})\nvalues {values}\n{on_conflict}"
+        if returning:
+            result = conn.execute(text(f"{q}\nreturning {returning}"), params)
+            out.extend(result.all() if "," in returning else result.scalars())
+        else:
+            conn.execute(text(q), params)
+    return out if returning else len(rows)
+
+
+def update_rows(
+    conn,
+    table: str,
+    key: str,
+    columns: list[str],
+    rows: list[dict],
+    casts: dict | None = None,
+    batch_size: int = BULK_BATCH,
+) -> int:
+    """
+    UPDATE ... FROM (VALUES ...) setting `columns` on the rows matched by
+    `key`.
+    """
+    casts = casts or {}
+    cols = [key] + list(columns)
+    assignments = ", ".join(f"{c} = _v.{c}" for c in columns)
+    for batch in _batches(rows, batch_size):
+        values, params = _values(cols, batch, casts)
+        conn.execute(
+            text(f"""
+            update {table} _t
+            set {assignments}
+            from (values {values}) as _v ({", ".join(cols)})
+            where _t.{key} = _v.{key}
+        """),
+            params,
+        )
+    return len(rows)
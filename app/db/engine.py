@@ -1,9 +1,133 @@
 import os
-from sqlalchemy import create_engine
+import time
+import threading
+from collections import Counter
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.db.vectors import install
+from app.registry import resource
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # max wait for a connection
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "60000"))  # 0 = server default
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait to check out a connection.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - t0
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_s += waited
+                self.max_wait_s = max(self.max_wait_s, waited)
+
+    def metrics(self) -> dict:
+        with self._metrics_lock:
+            return {
+                "size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": self.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.wait_s / self.checkouts * 1000, 3)
+                if self.checkouts
+                else None,
+                "max_wait_ms": round(self.max_wait_s * 1000, 3),
+            }
+
+
+_trips = Counter()
+_trips_lock = threading.Lock()
+
 
+def count_round_trips(kind: str, n: int = 1):
+    with _trips_lock:
+        _trips[kind] += n
 
+
+def round_trips() -> dict:
+    """
+    Process-wide DB round trips so far: statements, transactions (BEGIN +
+    COMMIT/ROLLBACK each) and pool checkouts (one pre-ping each).
+    """
+    with _trips_lock:
+        t = dict(_trips)
+    t.setdefault("statements", 0)
+    t.setdefault("transactions", 0)
+    t.setdefault("checkouts", 0)
+    t["total"] = t["statements"] + 2 * t["transactions"] + t["checkouts"]
+    return t
+
+
+def _install_counters(engine: Engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def _statement(*_args):
+        count_round_trips("statements")
+
+    @event.listens_for(engine, "begin")
+    def _begin(_conn):
+        count_round_trips("transactions")
+
+    @event.listens_for(engine.pool, "checkout")
+    def _checkout(*_args):
+        count_round_trips("checkouts")
+
+
+@resource("db_engine")
 def get_engine() -> Engine:
+    """
+    The process-wide engine. Every caller (API handlers, ingestion, the
+    worker) shares one bounded pool instead of opening its own.
+    """
     # Supabase gives you a Postgres connection string (DATABASE_URL)
     db_url = os.environ["DATABASE_URL"]
-    return create_engine(db_url, pool_pre_ping=True)
+
+    connect_args = {}
+    if STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"
+
+    engine = create_engine(
+        db_url,
+        poolclass=TimedQueuePool,
+        pool_size=POOL_SIZE,
+        max_overflow=MAX_OVERFLOW,
+        pool_recycle=POOL_RECYCLE,
+        pool_timeout=POOL_TIMEOUT,
+        pool_pre_ping=True,
+        connect_args=connect_args,
+    )
+    _install_counters(engine)
+    return install(engine)
+
+
+def pool_metrics() -> dict:
+    pool = get_engine().pool
+    if isinstance(pool, TimedQueuePool):
+        return {**pool.metrics(), "round_trips": round_trips()}
+    return {"status": pool.status(), "round_trips": round_trips()}
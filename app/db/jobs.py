@@ -0,0 +1,260 @@
+"""
+Postgres-backed job queue (the jobs table, migration 009).
+
+Workers lease one queued job at a time with FOR UPDATE SKIP LOCKED, so any
+number of processes can poll the same table without handing a job out
+twice. A lease lasts `lease_s` seconds and is extended by heartbeats; once
+it runs out the job is considered orphaned and goes back to the queue.
+Jobs with the same lock_key are serialized: at most one of them is running
+at any time, enforced by a partial unique index.
+"""
+
+import json
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+JOB_COLUMNS = """
+    id, kind, params, lock_key, status, priority, attempts, max_attempts,
+    run_after, locked_by, locked_until, heartbeat_at, progress, result,
+    last_error, created_at, started_at, finished_at
+"""
+
+
+def _json(value) -> str | None:
+    # results carry datetimes (watermarks, checkpoints)
+    return json.dumps(value, default=str) if value is not None else None
+
+
+def enqueue_job(
+    engine: Engine,
+    kind: str,
+    params: dict | None = None,
+    lock_key: str | None = None,
+    priority: int = 0,
+    max_attempts: int = 3,
+) -> dict:
+    """
+    Queues a job and returns {id, status}. An identical job (same kind,
+    lock_key and params) that is still waiting is returned instead of
+    queuing a duplicate.
+    """
+    q = text("""
+    with existing as (
+        select id, status
+        from jobs
+        where status = 'queued'
+          and kind = :kind
+          and lock_key is not distinct from :lock_key
+          and params = cast(:params as jsonb)
+        limit 1
+    ),
+    inserted as (
+        insert into jobs (kind, params, lock_key, priority, max_attempts)
+        select :kind, cast(:params as jsonb), :lock_key, :priority, :max_attempts
+        where not exists (select 1 from existing)
+        returning id, status
+    )
+    select id, status from inserted
+    union all
+    select id, status from existing;
+    """)
+    with engine.begin() as conn:
+        row = (
+            conn.execute(
+                q,
+                {
+                    "kind": kind,
+                    "params": _json(params or {}),
+                    "lock_key": lock_key,
+                    "priority": priority,
+                    "max_attempts": max_attempts,
+                },
+            )
+            .mappings()
+            .first()
+        )
+    return dict(row)
+
+
+def claim_job(
+    engine: Engine, worker_id: str, lease_s: int, kinds: list[str] | None = None
+) -> dict | None:
+    """
+    Leases the most urgent runnable job to `worker_id`, or returns None.
+    Skips jobs another worker has locked and jobs whose lock_key already
+    has a running job.
+    """
+    reap_q = text("""
+    update jobs
+    set status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+        last_error = 'lease expired on ' || coalesce(locked_by, '?'),
+        locked_by = null,
+        locked_until = null,
+        finished_at = CASE WHEN attempts >= max_attempts THEN now() END
+    where status = 'running' and locked_until < now();
+    """)
+    claim_q = text(f"""
+    with next as (
+        select j.id
+        from jobs j
+        where j.status = 'queued'
+          and j.run_after <= now()
+          {"and j.kind = any(:kinds)" if kinds else ""}
+          and (
+              j.lock_key is null
+              or not exists (
+                  select 1 from jobs r
+                  where r.status = 'running' and r.lock_key = j.lock_key
+              )
+          )
+        order by j.priority, j.run_after, j.id
+        limit 1
+        for update skip locked
+    )
+    update jobs
+    set status = 'running',
+        attempts = jobs.attempts + 1,
+        locked_by = :worker_id,
+        locked_until = now() + make_interval(secs => :lease_s),
+        heartbeat_at = now(),
+        started_at = coalesce(jobs.started_at, now())
+    from next
+    where jobs.id = next.id
+    returning jobs.id, jobs.kind, jobs.params, jobs.lock_key, jobs.attempts, jobs.max_attempts;
+    """)
+    try:
+        with engine.begin() as conn:
+            # leases that ran out belong to workers that died
+            conn.execute(reap_q)
+            row = (
+                conn.execute(
+                    claim_q, {"worker_id": worker_id, "lease_s": lease_s, "kinds": kinds}
+                )
+                .mappings()
+                .first()
+            )
+    except IntegrityError:
+        # another worker started a job with the same lock_key a moment ago
+        return None
+    return dict(row) if row else None
+
+
+def heartbeat_job(
+    engine: Engine, job_id: int, worker_id: str, lease_s: int, progress: dict | None = None
+) -> bool:
+    """
+    Extends the lease (and stores `progress`, when given). False means the
+    lease was lost and the job may be running elsewhere by now.
+    """
+    q = text("""
+    update jobs
+    set locked_until = now() + make_interval(secs => :lease_s),
+        heartbeat_at = now(),
+        progress = coalesce(cast(:progress as jsonb), progress)
+    where id = :id and locked_by = :worker_id and status = 'running'
+    returning id;
+    """)
+    with engine.begin() as conn:
+        row = conn.execute(
+            q,
+            {"id": job_id, "worker_id": worker_id, "lease_s": lease_s, "progress": _json(progress)},
+        ).first()
+    return row is not None
+
+
+def finish_job(engine: Engine, job_id: int, worker_id: str, result=None, progress=None):
+    q = text("""
+    update jobs
+    set status = 'succeeded',
+        result = cast(:result as jsonb),
+        progress = coalesce(cast(:progress as jsonb), progress),
+        last_error = null,
+        locked_by = null,
+        locked_until = null,
+        finished_at = now()
+    where id = :id and locked_by = :worker_id;
+    """)
+    with engine.begin() as conn:
+        conn.execute(
+            q,
+            {
+                "id": job_id,
+                "worker_id": worker_id,
+                "result": _json(result),
+                "progress": _json(progress),
+            },
+        )
+
+
+def fail_job(engine: Engine, job_id: int, worker_id: str, error: str, retry_in_s: float) -> str | None:
+    """
+    Records a failed attempt: the job is queued again after `retry_in_s`
+    seconds, or marked failed once it has used up max_attempts. Returns the
+    new status.
+    """
+    q = text("""
+    update jobs
+    set status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+        run_after = now() + make_interval(secs => :retry_in_s),
+        last_error = :error,
+        locked_by = null,
+        locked_until = null,
+        finished_at = CASE WHEN attempts < max_attempts THEN null ELSE now() END
+    where id = :id and locked_by = :worker_id
+    returning status;
+    """)
+    with engine.begin() as conn:
+        return conn.execute(
+            q,
+            {"id": job_id, "worker_id": worker_id, "error": error, "retry_in_s": retry_in_s},
+        ).scalar()
+
+
+def get_job(engine: Engine, job_id: int) -> dict | None:
+    with engine.begin() as conn:
+        row = (
+            conn.execute(text(f"select {JOB_COLUMNS} from jobs where id = :id"), {"id": job_id})
+            .mappings()
+            .first()
+        )
+    return dict(row) if row else None
+
+
+def queue_stats(engine: Engine) -> dict:
+    q = text("""
+    select status,
+           count(*) as jobs,
+           extract(epoch from now() - min(run_after) filter (where run_after <= now())) as oldest_s
+    from jobs
+    where status in ('queued', 'running')
+       or finished_at > now() - interval '1 day'
+    group by status;
+    """)
+    with engine.begin() as conn:
+        rows = conn.execute(q).mappings().all()
+    return {
+        r["status"]: {
+            "jobs": r["jobs"],
+            # how long the oldest queued job has been runnable
+            **(
+                {"oldest_wait_s": round(float(r["oldest_s"] or 0), 1)}
+                if r["status"] == "queued"
+                else {}
+            ),
+        }
+        for r in rows
+    }
+
+
+def last_finished(engine: Engine, kind: str) -> dict:
+    """lock_key -> finished_at of the latest successful `kind` job."""
+    q = text("""
+    select lock_key, max(finished_at) as finished_at
+    from jobs
+    where kind = :kind and status = 'succeeded'
+    group by lock_key;
+    """)
+    with engine.begin() as conn:
+        return {r[0]: r[1] for r in conn.execute(q, {"kind": kind})}
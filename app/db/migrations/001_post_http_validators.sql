@@ -0,0 +1,4 @@
+-- HTTP validators from the last successful post fetch, so re-ingestion can
+-- send If-None-Match / If-Modified-Since and get a 304 for unchanged posts.
+alter table posts add column if not exists etag text;
+alter table posts add column if not exists last_modified text;
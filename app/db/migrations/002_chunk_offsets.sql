@@ -0,0 +1,5 @@
+-- Chunks are stored as offsets into post_contents.clean_text instead of
+-- copies of the text. Older rows keep their content and have null offsets.
+alter table post_chunks add column if not exists start_offset integer;
+alter table post_chunks add column if not exists end_offset integer;
+alter table post_chunks alter column content drop not null;
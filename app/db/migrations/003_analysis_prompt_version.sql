@@ -0,0 +1,7 @@
+-- Lets the pipeline reuse an analysis by prompt_hash before calling the
+-- LLM, and lets version bumps find posts without a current analysis.
+alter table post_analysis add column if not exists prompt_version text;
+create index if not exists post_analysis_prompt_hash_idx
+    on post_analysis (prompt_hash);
+create index if not exists post_analysis_post_version_idx
+    on post_analysis (post_id, model, prompt_version);
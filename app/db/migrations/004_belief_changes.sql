@@ -0,0 +1,37 @@
+-- Materialized belief evolution. belief_changes holds every classified
+-- (earlier, later) claim pair; belief_change_claims records which claims
+-- have already been compared, so each run only looks at new ones.
+create table if not exists belief_changes (
+    id bigserial primary key,
+    author_id bigint not null,
+    earlier text not null,
+    later text not null,
+    earlier_seen timestamptz,
+    later_seen timestamptz,
+    relation text not null,
+    confidence real,
+    similarity real,
+    computed_at timestamptz not null default now(),
+    unique (author_id, earlier, later)
+);
+create index if not exists belief_changes_author_relation_idx
+    on belief_changes (author_id, relation, later_seen desc);
+
+create table if not exists belief_change_claims (
+    author_id bigint not null,
+    claim text not null,
+    first_seen timestamptz,
+    primary key (author_id, claim)
+);
+
+create table if not exists belief_change_runs (
+    id bigserial primary key,
+    author_id bigint not null,
+    started_at timestamptz not null default now(),
+    finished_at timestamptz,
+    new_claims int,
+    pairs_checked int,
+    changes_found int
+);
+create index if not exists belief_change_runs_author_idx
+    on belief_change_runs (author_id, started_at desc);
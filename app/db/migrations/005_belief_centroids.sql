@@ -0,0 +1,11 @@
+-- Incremental belief clustering: each belief keeps the running mean of its
+-- members' embeddings, and each occurrence records the belief it joined,
+-- so new occurrences can be assigned without reclustering everything.
+alter table author_beliefs add column if not exists id bigserial;
+alter table author_beliefs add column if not exists centroid vector;
+alter table belief_occurrences add column if not exists belief_id bigint;
+create index if not exists belief_occurrences_belief_idx
+    on belief_occurrences (belief_id);
+create index if not exists belief_occurrences_unassigned_idx
+    on belief_occurrences (author_id)
+    where belief_id is null and claim_type = 'ADVANCED';
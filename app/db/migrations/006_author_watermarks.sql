@@ -0,0 +1,6 @@
+-- Per-author high-water mark: the newest post whose ingestion (and that
+-- of every newer-than-previous-mark post before it) succeeded. Incremental
+-- discovery pages the archive only until it reaches this post.
+alter table authors add column if not exists watermark_published_at timestamptz;
+alter table authors add column if not exists watermark_slug text;
+alter table authors add column if not exists watermark_updated_at timestamptz;
@@ -0,0 +1,15 @@
+-- One full-archive backfill cursor per author. next_offset is the archive
+-- offset of the first page not yet processed; it is saved after every
+-- page so an interrupted backfill resumes there instead of at the top.
+create table if not exists ingest_backfill (
+    author_id bigint primary key,
+    next_offset int not null default 0,
+    posts_seen int not null default 0,
+    processed int not null default 0,
+    errors int not null default 0,
+    llm_calls int not null default 0,
+    started_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    completed_at timestamptz,
+    stopped_reason text
+);
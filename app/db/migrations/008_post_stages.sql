@@ -0,0 +1,17 @@
+-- Per-post pipeline progress. One row per (post, stage): the key of the
+-- input it was last run on, how often it has been attempted, and the last
+-- error. completed_at is null while the stage has not succeeded for that
+-- input, so a failed post resumes at the first stage that is missing or
+-- out of date instead of starting over.
+create table if not exists post_stages (
+    post_id bigint not null,
+    stage text not null,
+    input_key text,
+    attempts int not null default 0,
+    last_error text,
+    completed_at timestamptz,
+    updated_at timestamptz not null default now(),
+    primary key (post_id, stage)
+);
+create index if not exists post_stages_failed_idx
+    on post_stages (post_id) where last_error is not null;
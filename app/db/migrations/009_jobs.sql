@@ -0,0 +1,31 @@
+-- Durable job queue. Workers lease queued jobs with FOR UPDATE SKIP LOCKED
+-- and keep the lease alive with heartbeats; a job whose lease runs out
+-- (dead worker) goes back to the queue. Jobs sharing a lock_key (one
+-- author, or one global admin task) never run at the same time: the
+-- partial unique index allows a single running job per key.
+create table if not exists jobs (
+    id bigserial primary key,
+    kind text not null,
+    params jsonb not null default '{}',
+    lock_key text,
+    status text not null default 'queued',  -- queued | running | succeeded | failed
+    priority int not null default 0,        -- lower runs first
+    attempts int not null default 0,
+    max_attempts int not null default 3,
+    run_after timestamptz not null default now(),
+    locked_by text,
+    locked_until timestamptz,
+    heartbeat_at timestamptz,
+    progress jsonb,
+    result jsonb,
+    last_error text,
+    created_at timestamptz not null default now(),
+    started_at timestamptz,
+    finished_at timestamptz
+);
+create index if not exists jobs_queued_idx
+    on jobs (priority, run_after, id) where status = 'queued';
+create index if not exists jobs_running_lease_idx
+    on jobs (locked_until) where status = 'running';
+create unique index if not exists jobs_one_running_per_key
+    on jobs (lock_key) where status = 'running';
@@ -0,0 +1,4 @@
+-- Latest successful job per lock_key (the worker's per-author poll
+-- schedule and lag metrics).
+create index if not exists jobs_succeeded_idx
+    on jobs (kind, lock_key, finished_at desc) where status = 'succeeded';
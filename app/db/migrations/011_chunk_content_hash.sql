@@ -0,0 +1,6 @@
+-- Chunks are identified by a hash of the embedding model and their
+-- normalized text. Re-ingesting an edited post keeps rows whose hash is
+-- unchanged (and their vectors) and only inserts new ones. Older rows have
+-- no hash and are replaced the next time their post changes.
+alter table post_chunks add column if not exists content_hash text;
+create index if not exists post_chunks_post_id_idx on post_chunks (post_id);
@@ -2,13 +2,27 @@ from sqlalchemy import text
 from sqlalchemy.engine import Engine
 import json
 
+from app.db.bulk import insert_rows, update_rows
+from app.db.vectors import to_db
+
 
 def search_post_chunks(engine, post_id: int, embedding: list[float], limit: int = 5):
+    """
+    Nearest chunks as {content, start, end}; start/end are offsets into the
+    post's clean_text (None for chunks stored before offsets existed).
+    """
     q = text("""
-    select content
-    from post_chunks
-    where post_id = :post_id
-    order by embedding <-> CAST(:embedding AS vector)
+    select
+        coalesce(
+            pc.content,
+            substr(c.clean_text, pc.start_offset + 1, pc.end_offset - pc.start_offset)
+        ) as content,
+        pc.start_offset as start,
+        pc.end_offset as end
+    from post_chunks pc
+    left join post_contents c on c.post_id = pc.post_id
+    where pc.post_id = :post_id
+    order by pc.embedding <-> cast(:embedding as vector)
     limit :limit
     """)
 
@@ -17,12 +31,12 @@ def search_post_chunks(engine, post_id: int, embedding: list[float], limit: int
             q,
             {
                 "post_id": post_id,
-                "embedding": json.dumps(embedding),  # important
+                "embedding": to_db(embedding),
                 "limit": limit,
             },
-        ).fetchall()
+        ).mappings().all()
 
-    return [r[0] for r in rows]
+    return [dict(r) for r in rows]
 
 
 def upsert_author(
@@ -42,147 +56,615 @@ def upsert_author(
         ).scalar_one()
 
 
-def upsert_post_shell(
+def _set_post_processed(
+    conn,
+    post_id: int,
+    checksum: str,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    word_count: int | None = None,
+    title: str | None = None,
+):
+    q = text("""
+    update posts
+    set checksum = :checksum,
+        processed = true,
+        etag = coalesce(:etag, etag),
+        last_modified = coalesce(:last_modified, last_modified),
+        word_count = coalesce(:word_count, word_count),
+        title = CASE
+            WHEN :title IS NOT NULL AND (title IS NULL OR title = 'Untitled')
+            THEN :title
+            ELSE title
+        END
+    where id = :post_id;
+    """)
+    conn.execute(
+        q,
+        {
+            "post_id": post_id,
+            "checksum": checksum,
+            "etag": etag,
+            "last_modified": last_modified,
+            "word_count": word_count,
+            "title": title,
+        },
+    )
+
+
+def get_author_watermark(engine: Engine, author_id: int) -> dict | None:
+    q = text("""
+    select watermark_published_at as published_at, watermark_slug as slug
+    from authors
+    where id = :author_id;
+    """)
+    with engine.begin() as conn:
+        row = conn.execute(q, {"author_id": author_id}).mappings().first()
+    return dict(row) if row and row["published_at"] else None
+
+
+def advance_author_watermark(engine: Engine, author_id: int, published_at, slug: str | None):
+    # never moves backwards, even if two runs for one author overlap
+    q = text("""
+    update authors
+    set watermark_published_at = :published_at,
+        watermark_slug = :slug,
+        watermark_updated_at = now()
+    where id = :author_id
+      and (watermark_published_at is null or watermark_published_at < :published_at);
+    """)
+    with engine.begin() as conn:
+        conn.execute(q, {"author_id": author_id, "published_at": published_at, "slug": slug})
+
+
+def get_backfill_checkpoint(engine: Engine, author_id: int) -> dict | None:
+    q = text("""
+    select next_offset, posts_seen, processed, errors, llm_calls,
+           started_at, updated_at, completed_at, stopped_reason
+    from ingest_backfill
+    where author_id = :author_id;
+    """)
+    with engine.begin() as conn:
+        row = conn.execute(q, {"author_id": author_id}).mappings().first()
+    return dict(row) if row else None
+
+
+def save_backfill_checkpoint(
     engine: Engine,
     author_id: int,
-    title: str,
-    url: str,
-    published_at,
-    slug: str | None,
-    word_count: int | None,
+    next_offset: int,
+    posts_seen: int = 0,
+    processed: int = 0,
+    errors: int = 0,
+    llm_calls: int = 0,
+    completed: bool = False,
+    stopped_reason: str | None = None,
 ):
+    """
+    Moves the author's backfill cursor to `next_offset` and adds this
+    page's counts to the running totals.
+    """
     q = text("""
-    insert into posts (author_id, title, url, published_at, slug, word_count)
-    values (:author_id, :title, :url, :published_at, :slug, :word_count)
-    on conflict (url) do update
-    set title = CASE
-            WHEN posts.title IS NULL OR posts.title = 'Untitled'
-            THEN excluded.title
-            ELSE posts.title
-        END,
-        published_at = excluded.published_at,
-        slug = coalesce(excluded.slug, posts.slug),
-        word_count = coalesce(excluded.word_count, posts.word_count)
-    returning id, checksum, processed;
+    insert into ingest_backfill (
+        author_id, next_offset, posts_seen, processed, errors, llm_calls,
+        completed_at, stopped_reason
+    )
+    values (
+        :author_id, :next_offset, :posts_seen, :processed, :errors, :llm_calls,
+        case when :completed then now() end, :stopped_reason
+    )
+    on conflict (author_id) do update
+    set next_offset = excluded.next_offset,
+        posts_seen = ingest_backfill.posts_seen + excluded.posts_seen,
+        processed = ingest_backfill.processed + excluded.processed,
+        errors = ingest_backfill.errors + excluded.errors,
+        llm_calls = ingest_backfill.llm_calls + excluded.llm_calls,
+        updated_at = now(),
+        completed_at = excluded.completed_at,
+        stopped_reason = excluded.stopped_reason;
     """)
     with engine.begin() as conn:
-        row = (
+        conn.execute(
+            q,
+            {
+                "author_id": author_id,
+                "next_offset": next_offset,
+                "posts_seen": posts_seen,
+                "processed": processed,
+                "errors": errors,
+                "llm_calls": llm_calls,
+                "completed": completed,
+                "stopped_reason": stopped_reason,
+            },
+        )
+
+
+def reset_backfill_checkpoint(engine: Engine, author_id: int):
+    with engine.begin() as conn:
+        conn.execute(
+            text("delete from ingest_backfill where author_id = :author_id"),
+            {"author_id": author_id},
+        )
+
+
+def get_post_states(engine: Engine, author_id: int, urls: list[str] | None = None) -> dict:
+    """
+    url -> {id, checksum, processed, etag, last_modified, stages, chunks}
+    for the author's posts (only `urls`, when given), in one query.
+    `stages` is stage -> {key, done, attempts, error} from post_stages;
+    `chunks` are the stored post_chunks rows as {id, hash, index, start, end}.
+    """
+    q = text(f"""
+    select p.url, p.id, p.checksum, p.processed, p.etag, p.last_modified,
+           (
+               select json_object_agg(
+                   s.stage,
+                   json_build_object(
+                       'key', s.input_key,
+                       'done', s.completed_at is not null,
+                       'attempts', s.attempts,
+                       'error', s.last_error
+                   )
+               )
+               from post_stages s
+               where s.post_id = p.id
+           ) as stages,
+           (
+               select json_agg(
+                   json_build_object(
+                       'id', c.id,
+                       'hash', c.content_hash,
+                       'index', c.chunk_index,
+                       'start', c.start_offset,
+                       'end', c.end_offset
+                   )
+               )
+               from post_chunks c
+               where c.post_id = p.id
+           ) as chunks
+    from posts p
+    where p.author_id = :author_id
+    {"and p.url = any(:urls)" if urls is not None else ""};
+    """)
+    with engine.begin() as conn:
+        rows = conn.execute(q, {"author_id": author_id, "urls": urls}).mappings().all()
+    return {
+        r["url"]: {**dict(r), "stages": r["stages"] or {}, "chunks": r["chunks"] or []}
+        for r in rows
+    }
+
+
+def get_post_progress(engine: Engine, post_ids: list[int]) -> dict:
+    """
+    post_id -> {"html"}: the raw HTML earlier, unfinished runs stored.
+    """
+    with engine.begin() as conn:
+        rows = conn.execute(
+            text("select post_id, raw_html from post_contents where post_id = any(:ids)"),
+            {"ids": post_ids},
+        )
+        return {post_id: {"html": raw_html} for post_id, raw_html in rows}
+
+
+def list_failed_posts(
+    engine: Engine, author_id: int | None = None, max_attempts: int = 5, limit: int = 50
+):
+    """
+    Unprocessed posts whose last run failed at some stage, with that stage
+    tried fewer than `max_attempts` times.
+    """
+    q = text(f"""
+    select * from (
+        select distinct on (p.id)
+               p.id, p.author_id, a.subdomain, p.url, p.slug, p.title, p.published_at,
+               s.stage as failed_stage, s.attempts, s.last_error
+        from post_stages s
+        join posts p on p.id = s.post_id
+        join authors a on a.id = p.author_id
+        where s.last_error is not null
+          and s.attempts < :max_attempts
+          and not coalesce(p.processed, false)
+          {"and p.author_id = :author_id" if author_id is not None else ""}
+        order by p.id, s.updated_at desc
+    ) f
+    order by author_id, published_at
+    limit :limit;
+    """)
+    with engine.begin() as conn:
+        rows = (
             conn.execute(
-                q,
-                {
-                    "author_id": author_id,
-                    "title": title,
-                    "url": url,
-                    "published_at": published_at,
-                    "slug": slug,
-                    "word_count": word_count,
-                },
+                q, {"author_id": author_id, "max_attempts": max_attempts, "limit": limit}
             )
             .mappings()
-            .one()
+            .all()
         )
-        return dict(row)
+    return [dict(r) for r in rows]
 
 
-def should_skip_processing(engine: Engine, post_id: int, new_checksum: str) -> bool:
-    q = text("select checksum, processed from posts where id = :post_id;")
+def list_failed_authors(engine: Engine, max_attempts: int = 5) -> list[int]:
+    """Authors with at least one post list_failed_posts would return."""
+    q = text("""
+    select distinct p.author_id
+    from post_stages s
+    join posts p on p.id = s.post_id
+    where s.last_error is not null
+      and s.attempts < :max_attempts
+      and not coalesce(p.processed, false)
+    order by p.author_id;
+    """)
     with engine.begin() as conn:
-        row = conn.execute(q, {"post_id": post_id}).mappings().one()
-    return bool(row["processed"]) and row["checksum"] == new_checksum
+        return [r[0] for r in conn.execute(q, {"max_attempts": max_attempts})]
 
 
-def set_post_processed(engine: Engine, post_id: int, checksum: str):
-    q = text("""
-    update posts
-    set checksum = :checksum,
-        processed = true
-    where id = :post_id;
-    """)
+def upsert_post_shells(engine: Engine, author_id: int, shells: list[dict]) -> dict:
+    """
+    Inserts or refreshes the posts rows for a page of posts in one
+    statement. Each shell has title, url, published_at and slug. Returns
+    url -> post id.
+    """
+    unique = list({sh["url"]: sh for sh in shells}.values())
+    if not unique:
+        return {}
+
     with engine.begin() as conn:
-        conn.execute(q, {"post_id": post_id, "checksum": checksum})
+        rows = insert_rows(
+            conn,
+            "posts",
+            ["author_id", "title", "url", "published_at", "slug"],
+            [
+                {
+                    "author_id": author_id,
+                    "title": sh["title"],
+                    "url": sh["url"],
+                    "published_at": sh.get("published_at"),
+                    "slug": sh.get("slug"),
+                }
+                for sh in unique
+            ],
+            on_conflict="""
+            on conflict (url) do update
+            set title = CASE
+                    WHEN posts.title IS NULL OR posts.title = 'Untitled'
+                    THEN excluded.title
+                    ELSE posts.title
+                END,
+                published_at = excluded.published_at,
+                slug = coalesce(excluded.slug, posts.slug)
+            """,
+            returning="url, id",
+        )
+    return {url: post_id for url, post_id in rows}
 
 
-def upsert_post_content(engine: Engine, post_id: int, raw_html: str, clean_text: str):
+def _upsert_post_content(conn, post_id: int, raw_html: str, clean_text: str | None):
+    # clean_text=None keeps the stored text, which the stored chunks point into
     q = text("""
     insert into post_contents (post_id, raw_html, clean_text)
-    values (:post_id, :raw_html, :clean_text)
+    values (:post_id, :raw_html, coalesce(:clean_text, ''))
     on conflict (post_id) do update
     set raw_html = excluded.raw_html,
-        clean_text = excluded.clean_text;
+        clean_text = coalesce(:clean_text, post_contents.clean_text);
     """)
-    with engine.begin() as conn:
+    conn.execute(q, {"post_id": post_id, "raw_html": raw_html, "clean_text": clean_text})
+
+
+def _sync_chunks(conn, post_id: int, chunks: list[dict], gone_ids: list[int]):
+    """
+    Brings the post's chunk rows in line with `chunks`, each {id, index,
+    start, end, hash, embedding, moved}: rows in gone_ids are deleted,
+    chunks with an id keep their row and vector (only repositioned when
+    `moved`), and the rest are inserted with their new embedding.
+
+    Chunks are (start, end) offsets into post_contents.clean_text; the text
+    itself is not duplicated into post_chunks.
+    """
+    if gone_ids:
         conn.execute(
-            q, {"post_id": post_id, "raw_html": raw_html, "clean_text": clean_text}
+            text("delete from post_chunks where id = any(:ids)"), {"ids": gone_ids}
+        )
+
+    moved = [
+        {
+            "id": c["id"],
+            "chunk_index": c["index"],
+            "start_offset": c["start"],
+            "end_offset": c["end"],
+        }
+        for c in chunks
+        if c["id"] is not None and c.get("moved")
+    ]
+    if moved:
+        update_rows(
+            conn, "post_chunks", "id", ["chunk_index", "start_offset", "end_offset"], moved
         )
 
+    insert_rows(
+        conn,
+        "post_chunks",
+        ["post_id", "chunk_index", "start_offset", "end_offset", "content_hash", "embedding"],
+        [
+            {
+                "post_id": post_id,
+                "chunk_index": c["index"],
+                "start_offset": c["start"],
+                "end_offset": c["end"],
+                "content_hash": c["hash"],
+                "embedding": to_db(c["embedding"]),
+            }
+            for c in chunks
+            if c["id"] is None
+        ],
+        casts={"embedding": "vector"},
+    )
+
 
-def replace_chunks(
-    engine: Engine, post_id: int, chunks: list[str], embeddings: list[list[float]]
+def insert_analysis(
+    engine,
+    post_id: int,
+    analysis: dict,
+    model: str,
+    prompt_hash: str,
+    prompt_version: str | None = None,
 ):
-    # delete old, insert new in a single transaction
-    del_q = text("delete from post_chunks where post_id = :post_id;")
-    ins_q = text("""
-    insert into post_chunks (post_id, chunk_index, content, embedding)
-    values (:post_id, :chunk_index, :content, (:embedding)::vector);
-    """)
     with engine.begin() as conn:
-        conn.execute(del_q, {"post_id": post_id})
-        for i, (c, e) in enumerate(zip(chunks, embeddings)):
-            conn.execute(
-                ins_q,
-                {
-                    "post_id": post_id,
-                    "chunk_index": i,
-                    "content": c,
-                    "embedding": e,  # SQLAlchemy will pass list -> text; cast handles it
-                },
-            )
+        _insert_analysis(conn, post_id, analysis, model, prompt_hash, prompt_version)
 
 
-def insert_analysis(engine, post_id: int, analysis: dict, model: str, prompt_hash: str):
-    from sqlalchemy import text
-    import json
-
+def _insert_analysis(conn, post_id, analysis, model, prompt_hash, prompt_version=None):
     q = text("""
     insert into post_analysis (
       post_id, summary, main_claim, bias_score, confidence,
       arguments_for, arguments_against, notable_quotes, topics, entities,
-      model, prompt_hash
+      model, prompt_hash, prompt_version
     )
     values (
       :post_id, :summary, :main_claim, :bias_score, :confidence,
       :arguments_for, :arguments_against, :notable_quotes, :topics, :entities,
-      :model, :prompt_hash
+      :model, :prompt_hash, :prompt_version
     )
-    on conflict (post_id, prompt_hash) do nothing;
+    on conflict (post_id, prompt_hash) do update
+    set prompt_version = coalesce(post_analysis.prompt_version, excluded.prompt_version);
     """)
 
+    conn.execute(
+        q,
+        {
+            "post_id": post_id,
+            "summary": analysis.get("summary"),
+            "main_claim": analysis.get("main_claim"),
+            "bias_score": analysis.get("bias_score"),
+            "confidence": analysis.get("confidence"),
+            "arguments_for": json.dumps(analysis.get("arguments_for", [])),
+            "arguments_against": json.dumps(analysis.get("arguments_against", [])),
+            "notable_quotes": json.dumps(analysis.get("notable_quotes", [])),
+            "topics": json.dumps(analysis.get("topics", [])),
+            "entities": json.dumps(analysis.get("entities", [])),
+            "model": model,
+            "prompt_hash": prompt_hash,
+            "prompt_version": prompt_version,
+        },
+    )
+
+
+def find_analysis_by_hash(engine, prompt_hash: str, post_id: int | None = None):
+    """
+    A stored analysis with this prompt_hash (same prompt, model and text),
+    preferring the given post's own row. None if the LLM has never seen it.
+    """
+    q = text("""
+    select
+        post_id, summary, main_claim, bias_score, confidence,
+        arguments_for, arguments_against, notable_quotes, topics, entities,
+        model
+    from post_analysis
+    where prompt_hash = :prompt_hash
+    order by (post_id = :post_id) desc nulls last, analyzed_at desc
+    limit 1
+    """)
     with engine.begin() as conn:
-        conn.execute(
-            q,
+        row = (
+            conn.execute(q, {"prompt_hash": prompt_hash, "post_id": post_id})
+            .mappings()
+            .first()
+        )
+    return dict(row) if row else None
+
+
+def persist_post(
+    engine: Engine,
+    post_id: int,
+    *,
+    raw_html: str | None,
+    clean_text: str | None,
+    checksum: str | None = None,
+    word_count: int | None = None,
+    title: str | None = None,
+    etag: str | None = None,
+    last_modified: str | None = None,
+    chunks: list[dict] | None = None,
+    gone_chunk_ids: list[int] | None = None,
+    analysis: dict | None = None,
+    model: str | None = None,
+    prompt_hash: str | None = None,
+    prompt_version: str | None = None,
+    author_id: int | None = None,
+    occurred_at=None,
+    claims=None,
+    stages: list[dict] | None = None,
+    processed: bool = True,
+):
+    """
+    Everything one ingested post produces, in a single transaction: content,
+    chunks, analysis, claims (each when given), stage progress and the
+    processed flag last, so a failure part-way leaves the post unprocessed.
+
+    processed=False stores whatever a failed run got through, so the next
+    run can resume from it. clean_text=None keeps the stored text; chunk
+    offsets point into it, so it only changes together with the chunks.
+    """
+    with engine.begin() as conn:
+        if raw_html is not None:
+            _upsert_post_content(conn, post_id, raw_html, clean_text)
+        if chunks is not None:
+            _sync_chunks(conn, post_id, chunks, gone_chunk_ids or [])
+        if analysis is not None:
+            _insert_analysis(conn, post_id, analysis, model, prompt_hash, prompt_version)
+        if claims:
+            _insert_belief_occurrences(conn, author_id, post_id, occurred_at, claims)
+        if stages:
+            _upsert_post_stages(conn, post_id, stages)
+        if processed:
+            _set_post_processed(
+                conn, post_id, checksum, etag, last_modified, word_count=word_count, title=title
+            )
+        elif raw_html is not None:
+            # stored content is newer than what was last fully processed
+            conn.execute(
+                text("update posts set processed = false where id = :post_id"),
+                {"post_id": post_id},
+            )
+
+
+def _upsert_post_stages(conn, post_id: int, stages: list[dict]):
+    """
+    Each stage is {stage, key, ran, error}: `ran` adds an attempt, and a
+    stage without an error counts as completed for `key`. Stages reused
+    from an earlier run keep their original completion time.
+    """
+    from datetime import datetime, timezone
+
+    now = datetime.now(timezone.utc)
+    insert_rows(
+        conn,
+        "post_stages",
+        ["post_id", "stage", "input_key", "attempts", "last_error", "completed_at"],
+        [
             {
                 "post_id": post_id,
-                "summary": analysis.get("summary"),
-                "main_claim": analysis.get("main_claim"),
-                "bias_score": analysis.get("bias_score"),
-                "confidence": analysis.get("confidence"),
-                "arguments_for": json.dumps(analysis.get("arguments_for", [])),
-                "arguments_against": json.dumps(analysis.get("arguments_against", [])),
-                "notable_quotes": json.dumps(analysis.get("notable_quotes", [])),
-                "topics": json.dumps(analysis.get("topics", [])),
-                "entities": json.dumps(analysis.get("entities", [])),
+                "stage": st["stage"],
+                "input_key": st.get("key"),
+                "attempts": 1 if st.get("ran") else 0,
+                "last_error": st.get("error"),
+                "completed_at": None if st.get("error") else now,
+            }
+            for st in stages
+        ],
+        casts={"attempts": "int", "completed_at": "timestamptz"},
+        on_conflict="""
+        on conflict (post_id, stage) do update
+        set input_key = excluded.input_key,
+            attempts = post_stages.attempts + excluded.attempts,
+            last_error = excluded.last_error,
+            completed_at = CASE
+                WHEN excluded.attempts = 0 AND post_stages.input_key = excluded.input_key
+                THEN coalesce(post_stages.completed_at, excluded.completed_at)
+                ELSE excluded.completed_at
+            END,
+            updated_at = now()
+        """,
+    )
+
+
+def list_posts_needing_analysis(
+    engine,
+    model: str,
+    prompt_version: str,
+    author_id: int | None = None,
+    limit: int | None = None,
+):
+    """
+    Posts with content but no analysis from this model + prompt version,
+    oldest first.
+    """
+    q = text("""
+    select p.id as post_id, p.author_id, p.published_at, c.clean_text
+    from posts p
+    join post_contents c on c.post_id = p.id
+    where (cast(:author_id as bigint) is null or p.author_id = :author_id)
+      and c.clean_text is not null
+      and not exists (
+        select 1 from post_analysis pa
+        where pa.post_id = p.id
+          and pa.model = :model
+          and pa.prompt_version = :prompt_version
+      )
+    order by p.published_at asc nulls last, p.id
+    limit :limit
+    """)
+    with engine.begin() as conn:
+        rows = conn.execute(
+            q,
+            {
+                "author_id": author_id,
                 "model": model,
-                "prompt_hash": prompt_hash,
+                "prompt_version": prompt_version,
+                "limit": limit,
             },
-        )
+        ).mappings()
+        return [dict(r) for r in rows]
 
 
-def list_author_urls(engine):
-    from sqlalchemy import text
-
+def reanalysis_plan(engine, model: str, prompt_version: str):
+    """
+    Per author: posts with content, and how many of them still lack an
+    analysis from this model + prompt version.
+    """
+    q = text("""
+    select
+        a.id as author_id,
+        a.name,
+        count(*) as posts,
+        count(*) filter (
+          where not exists (
+            select 1 from post_analysis pa
+            where pa.post_id = p.id
+              and pa.model = :model
+              and pa.prompt_version = :prompt_version
+          )
+        ) as stale
+    from authors a
+    join posts p on p.author_id = a.id
+    join post_contents c on c.post_id = p.id
+    group by a.id, a.name
+    order by stale desc
+    """)
     with engine.begin() as conn:
-        rows = conn.execute(text("select subdomain from authors")).fetchall()
-    return [f"https://{r[0]}.substack.com" for r in rows]
+        rows = conn.execute(
+            q, {"model": model, "prompt_version": prompt_version}
+        ).mappings()
+        return [dict(r) for r in rows]
+
+
+def get_publishing_stats(engine, author_ids: list[int] | None = None, window: int = 20):
+    """
+    author_id -> {last_published, posts, median_gap_s} over each author's
+    `window` most recent dated posts, in one query.
+    """
+    q = text(f"""
+    with recent as (
+        select author_id, published_at,
+               row_number() over (partition by author_id order by published_at desc) as rn
+        from posts
+        where published_at is not null
+          {"and author_id = any(:ids)" if author_ids is not None else ""}
+    ),
+    gaps as (
+        select author_id, published_at,
+               extract(epoch from published_at - lag(published_at)
+                   over (partition by author_id order by published_at)) as gap_s
+        from recent
+        where rn <= :window
+    )
+    select author_id,
+           max(published_at) as last_published,
+           count(*) as posts,
+           percentile_cont(0.5) within group (order by gap_s) as median_gap_s
+    from gaps
+    group by author_id;
+    """)
+    with engine.begin() as conn:
+        rows = conn.execute(q, {"ids": author_ids, "window": window}).mappings().all()
+    return {r["author_id"]: dict(r) for r in rows}
 
 
 def list_authors(engine):
@@ -409,32 +891,43 @@ def get_author_profile(engine, author_id):
 
 
 def insert_belief_occurrences(engine, author_id, post_id, occurred_at, claims):
-    from sqlalchemy import text
+    with engine.begin() as conn:
+        _insert_belief_occurrences(conn, author_id, post_id, occurred_at, claims)
+
+
+def replace_belief_occurrences(engine, author_id, post_id, occurred_at, claims):
+    # a re-analysis supersedes the post's earlier claims
+    with engine.begin() as conn:
+        conn.execute(
+            text("delete from belief_occurrences where post_id = :post_id"),
+            {"post_id": post_id},
+        )
+        _insert_belief_occurrences(conn, author_id, post_id, occurred_at, claims)
+
+
+def _insert_belief_occurrences(conn, author_id, post_id, occurred_at, claims):
     from datetime import datetime, timezone
 
     # fallback: if post has no publication date, use "now" once
     if occurred_at is None:
         occurred_at = datetime.now(timezone.utc)
 
-    q = text("""
-    insert into belief_occurrences
-    (author_id, post_id, claim, polarity, confidence, occurred_at)
-    values (:author_id, :post_id, :claim, :polarity, :confidence, :occurred_at)
-    """)
-
-    with engine.begin() as conn:
-        for claim, polarity, conf in claims:
-            conn.execute(
-                q,
-                {
-                    "author_id": author_id,
-                    "post_id": post_id,
-                    "claim": claim,
-                    "polarity": polarity,
-                    "confidence": conf,
-                    "occurred_at": occurred_at,
-                },
-            )
+    insert_rows(
+        conn,
+        "belief_occurrences",
+        ["author_id", "post_id", "claim", "polarity", "confidence", "occurred_at"],
+        [
+            {
+                "author_id": author_id,
+                "post_id": post_id,
+                "claim": claim,
+                "polarity": polarity,
+                "confidence": conf,
+                "occurred_at": occurred_at,
+            }
+            for claim, polarity, conf in claims
+        ],
+    )
 
 
 def get_author_beliefs(engine, author_id):
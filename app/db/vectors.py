@@ -0,0 +1,108 @@
+"""
+Vector I/O between numpy and pgvector columns.
+
+Reads select vector_send(col), pgvector's binary wire format (int16 dim,
+int16 unused, dim big-endian float4), so nothing is formatted or parsed
+as text on the way out, and whole result sets decode into one contiguous
+float32 matrix.
+
+Writes pass numpy arrays through pgvector's psycopg2 adapter when the
+`pgvector` package is installed, and a "[x,y,...]" literal otherwise.
+Either way the SQL side is cast(:param as vector).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+from sqlalchemy import event
+
+try:
+    from pgvector.psycopg2 import register_vector
+
+    HAVE_PGVECTOR = True
+except ImportError:  # optional; text literals still work
+    register_vector = None
+    HAVE_PGVECTOR = False
+
+HEADER_BYTES = 4
+
+
+def install(engine):
+    """
+    Registers the pgvector adapter on every new connection of `engine`.
+    No-op without the pgvector package.
+    """
+    if not HAVE_PGVECTOR:
+        return engine
+
+    @event.listens_for(engine, "connect")
+    def _register(dbapi_conn, _record):
+        try:
+            register_vector(dbapi_conn)
+        except Exception as e:  # extension missing on this database
+            print(f"[warn] pgvector adapter not registered: {e}")
+
+    return engine
+
+
+def binary(column: str) -> str:
+    """SQL expression selecting `column` in binary form."""
+    return f"vector_send({column})"
+
+
+def to_db(vec):
+    """Query parameter for a vector; pair it with cast(:p as vector)."""
+    if vec is None:
+        return None
+    arr = np.asarray(vec, dtype=np.float32)
+    if HAVE_PGVECTOR:
+        return arr
+    return _literal_format(len(arr)) % tuple(arr.tolist())
+
+
+@lru_cache(maxsize=8)
+def _literal_format(dim: int) -> str:
+    # %.9g round-trips float32 exactly
+    return "[" + ",".join(["%.9g"] * dim) + "]"
+
+
+def from_db(value) -> np.ndarray | None:
+    """One vector from any representation a driver may hand back."""
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(value, dtype=">f4", offset=HEADER_BYTES).astype(np.float32)
+    if isinstance(value, str):
+        return np.fromstring(value.strip("[]"), sep=",", dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
+
+
+def stack(values, dim: int | None = None) -> np.ndarray:
+    """
+    Contiguous (n, dim) float32 matrix from binary vectors, decoded in one
+    pass over a single buffer. Falls back to per-row decoding for other
+    representations.
+    """
+    values = list(values)
+    if not values:
+        return np.zeros((0, dim or 0), dtype=np.float32)
+
+    if all(isinstance(v, (bytes, bytearray, memoryview)) for v in values):
+        width = len(values[0])
+        if all(len(v) == width for v in values):
+            raw = np.frombuffer(b"".join(values), dtype=np.uint8).reshape(len(values), width)
+            body = np.ascontiguousarray(raw[:, HEADER_BYTES:])
+            return body.view(">f4").astype(np.float32)
+
+    return np.vstack([from_db(v) for v in values]).astype(np.float32, copy=False)
+
+
+def fetch_matrix(conn, query, params=None, column: str = "embedding"):
+    """
+    Runs `query` (which selects `column` via binary()) and returns
+    (rows, matrix): the other columns as dicts, and the vectors as one
+    float32 matrix in the same order.
+    """
+    rows = conn.execute(query, params or {}).mappings().all()
+    matrix = stack(r[column] for r in rows)
+    return [{k: v for k, v in r.items() if k != column} for r in rows], matrix
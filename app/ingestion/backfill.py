@@ -0,0 +1,175 @@
+"""
+Full-archive backfill: walks an author's whole archive, newest page
+first, through the same per-post pipeline as ingest_author.
+
+The archive offset of the next unprocessed page is saved after every page
+(ingest_backfill), so a run that is stopped, crashes or runs out of budget
+resumes there on the next call instead of starting over. Posts already
+ingested come back as skipped_unchanged, so re-reading a page costs no
+LLM calls.
+"""
+
+import os
+import time
+from collections import Counter
+
+from sqlalchemy.engine import Engine
+
+from app.ai.groq_analysis import MAX_CALLS_PER_ARTICLE
+from app.ai.llm import BACKFILL
+from app.db.queries import (
+    upsert_author,
+    get_author_watermark,
+    advance_author_watermark,
+    get_backfill_checkpoint,
+    save_backfill_checkpoint,
+    reset_backfill_checkpoint,
+)
+from app.ingestion.pipeline import (
+    INGEST_WORKERS,
+    OUTCOMES,
+    ingest_items,
+    new_item,
+    parse_subdomain,
+    refresh_author_profile,
+    watermark_after,
+)
+from app.ingestion.substack_client import ARCHIVE_PAGE_SIZE, SubstackClient
+
+# 0 = no cap; callers can override per run
+BACKFILL_MAX_SECONDS = float(os.getenv("BACKFILL_MAX_SECONDS", "0"))
+BACKFILL_MAX_LLM_CALLS = int(os.getenv("BACKFILL_MAX_LLM_CALLS", "0"))
+
+
+def backfill_author(
+    engine: Engine,
+    newsletter_url: str,
+    max_seconds: float | None = None,
+    max_llm_calls: int | None = None,
+    workers: int | None = None,
+    replay: bool = False,
+    restart: bool = False,
+    progress=None,
+):
+    """
+    Ingests the author's archive page by page from the stored cursor until
+    the archive ends or a budget runs out.
+
+    max_seconds is checked between pages, so a run can overshoot it by one
+    page. max_llm_calls is never exceeded: a post costs at most
+    MAX_CALLS_PER_ARTICLE calls (analysis plus a JSON repair), so pages
+    shrink to what the remaining budget covers in the worst case, and the
+    run stops once it can't cover one more post. restart=True
+    drops the cursor and walks the archive from the top again. `progress`,
+    if given, is called with the running totals after every page.
+
+    Analysis calls go through the LLM scheduler at BACKFILL priority, behind
+    interactive requests and regular ingestion.
+    """
+    workers = workers or INGEST_WORKERS
+    if max_seconds is None:
+        max_seconds = BACKFILL_MAX_SECONDS or None
+    if max_llm_calls is None:
+        max_llm_calls = BACKFILL_MAX_LLM_CALLS or None
+    started = time.perf_counter()
+
+    client = SubstackClient(newsletter_url, replay=replay)
+    subdomain = parse_subdomain(newsletter_url)
+    author_id = upsert_author(
+        engine, subdomain=subdomain, name=subdomain, description=None
+    )
+
+    if restart:
+        reset_backfill_checkpoint(engine, author_id)
+    checkpoint = get_backfill_checkpoint(engine, author_id)
+    start_offset = checkpoint["next_offset"] if checkpoint else 0
+
+    counts = Counter()
+    llm_calls = 0
+    pages = 0
+    offset = start_offset
+    stopped = None
+    completed = bool(checkpoint and checkpoint["completed_at"])
+
+    while not completed:
+        if max_seconds and time.perf_counter() - started >= max_seconds:
+            stopped = "max_seconds"
+            break
+        size = ARCHIVE_PAGE_SIZE
+        if max_llm_calls:
+            affordable = (max_llm_calls - llm_calls) // MAX_CALLS_PER_ARTICLE
+            if affordable < 1:
+                stopped = "max_llm_calls"
+                break
+            size = min(size, affordable)
+
+        try:
+            page = client.get_archive_page(offset, size)
+        except Exception as e:
+            # cursor stays put; the next run retries this page
+            print(f"[error] backfill archive page {offset} for {newsletter_url}: {e}")
+            stopped = f"error: {e}"
+            break
+
+        items = [new_item(p) for p in page]
+        run = (
+            ingest_items(engine, client, author_id, items, workers, replay, BACKFILL)
+            if items
+            else {"counts": Counter(), "llm_calls": 0}
+        )
+
+        # the first page is the newest; seed the incremental watermark from
+        # it the same way a full ingest_author run would
+        if offset == 0 and get_author_watermark(engine, author_id) is None:
+            mark = watermark_after(items)
+            if mark:
+                advance_author_watermark(
+                    engine, author_id, mark["published_at"], mark["slug"]
+                )
+
+        pages += 1
+        offset += len(page)
+        counts.update(run["counts"])
+        llm_calls += run["llm_calls"]
+        completed = len(page) < size
+
+        save_backfill_checkpoint(
+            engine,
+            author_id,
+            offset,
+            posts_seen=len(page),
+            processed=run["counts"]["processed"],
+            errors=run["counts"]["errors"],
+            llm_calls=run["llm_calls"],
+            completed=completed,
+        )
+        if progress:
+            progress(
+                {
+                    "next_offset": offset,
+                    "pages": pages,
+                    "posts_seen": sum(counts.values()),
+                    "processed": counts["processed"],
+                    "llm_calls": llm_calls,
+                }
+            )
+
+    if stopped:
+        save_backfill_checkpoint(engine, author_id, offset, stopped_reason=stopped)
+
+    profile_computed = refresh_author_profile(engine, author_id) if pages else False
+
+    return {
+        "author_id": author_id,
+        "completed": completed,
+        "stopped_reason": stopped,
+        "start_offset": start_offset,
+        "next_offset": offset,
+        "pages": pages,
+        "posts_seen": sum(counts.values()),
+        **{name: counts[name] for name in OUTCOMES},
+        "llm_calls": llm_calls,
+        "profile_computed": profile_computed,
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
@@ -1,10 +1,115 @@
-def chunk_text(text: str, size=1800, overlap=250) -> list[str]:
+import os
+import re
+import hashlib
+
+# all-MiniLM-L6-v2 truncates input at 256 word pieces; stay under that
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "200"))
+# content-defined cuts: typical chunk size, and no cut below the minimum
+CHUNK_TARGET_TOKENS = int(os.getenv("CHUNK_TARGET_TOKENS", "150"))
+CHUNK_MIN_TOKENS = int(os.getenv("CHUNK_MIN_TOKENS", "60"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+")
+_WORD = re.compile(r"\S+")
+
+
+def estimate_tokens(s: str) -> int:
+    # ~1.3 word pieces per English word; close enough to budget chunks
+    return (len(s.split()) * 4 + 2) // 3
+
+
+def paragraph_spans(text: str) -> list[tuple[int, int]]:
+    spans = []
+    pos = 0
+    for line in text.split("\n"):
+        if line.strip():
+            spans.append((pos, pos + len(line)))
+        pos += len(line) + 1
+    return spans
+
+
+def _sentence_spans(text: str, start: int, end: int):
+    pos = start
+    for m in _SENTENCE_END.finditer(text, start, end):
+        yield pos, m.start()
+        pos = m.end()
+    if pos < end:
+        yield pos, end
+
+
+def _word_windows(text: str, start: int, end: int, max_tokens: int):
+    words = [(m.start(), m.end()) for m in _WORD.finditer(text, start, end)]
+    step = max(1, max_tokens * 3 // 4)
+    for i in range(0, len(words), step):
+        window = words[i : i + step]
+        yield window[0][0], window[-1][1]
+
+
+def _units(text: str, paragraphs, max_tokens: int):
+    # paragraphs, falling back to sentences, then word windows, when too big
+    for a, b in paragraphs:
+        n = estimate_tokens(text[a:b])
+        if n <= max_tokens:
+            yield a, b, n
+            continue
+        for sa, sb in _sentence_spans(text, a, b):
+            n = estimate_tokens(text[sa:sb])
+            if n <= max_tokens:
+                yield sa, sb, n
+            else:
+                for wa, wb in _word_windows(text, sa, sb, max_tokens):
+                    yield wa, wb, estimate_tokens(text[wa:wb])
+
+
+def _is_cut(unit: str, tokens: int, target: int) -> bool:
+    # depends only on the unit's own text, with probability tokens/target,
+    # so chunks average ~target tokens whatever the unit sizes
+    digest = hashlib.blake2b(" ".join(unit.split()).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < tokens / target * 2**64
+
+
+def chunk_spans(
+    text: str,
+    paragraphs=None,
+    max_tokens: int = CHUNK_TOKENS,
+    target_tokens: int = CHUNK_TARGET_TOKENS,
+    min_tokens: int = CHUNK_MIN_TOKENS,
+) -> list[tuple[int, int]]:
+    """
+    Groups whole paragraphs into chunks of at most ~max_tokens and returns
+    (start, end) offsets into `text`. Paragraphs that don't fit alone are
+    split on sentence boundaries. `paragraphs` are the offsets from
+    cleaner.extract(); they are recomputed from newlines if omitted.
+
+    Boundaries are content-defined: a chunk ends after a paragraph (or
+    sentence) whose text hashes to a cut point, once it holds min_tokens.
+    Where chunks split therefore depends on nearby text only, so an edit
+    changes the chunks around it and not every chunk after it.
+    """
     if not text:
         return []
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = min(len(text), start + size)
-        chunks.append(text[start:end])
-        start += max(1, size - overlap)
-    return chunks
+    if paragraphs is None:
+        paragraphs = paragraph_spans(text)
+
+    spans = []
+    start = end = None
+    tokens = 0
+
+    for a, b, n in _units(text, paragraphs, max_tokens):
+        if start is not None and tokens + n > max_tokens:
+            spans.append((start, end))
+            start = None
+        if start is None:
+            start, tokens = a, 0
+        end = b
+        tokens += n
+        if tokens >= min_tokens and _is_cut(text[a:b], n, target_tokens):
+            spans.append((start, end))
+            start = None
+
+    if start is not None:
+        spans.append((start, end))
+    return spans
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS) -> list[str]:
+    return [text[a:b] for a, b in chunk_spans(text, max_tokens=max_tokens)]
@@ -1,10 +1,50 @@
+import importlib.util
+
 from bs4 import BeautifulSoup
 
+# lxml's C parser is several times faster than html.parser on long posts;
+# use it when installed.
+PARSER = "lxml" if importlib.util.find_spec("lxml") is not None else "html.parser"
+
+
+def extract(html: str) -> dict:
+    """
+    Everything ingestion needs from one post, from a single parse:
+
+    text        cleaned text, one non-empty stripped line per paragraph
+    title       og:title, else the first non-empty <h1>
+    h1          first <h1> text (or None)
+    word_count  whitespace-separated words in text
+    paragraphs  (start, end) offsets of each line within text
+    """
+    soup = BeautifulSoup(html or "", PARSER)
+
+    h1_tag = soup.find("h1")
+    h1 = h1_tag.get_text(strip=True) if h1_tag else None
+    og = soup.find("meta", property="og:title")
+    title = (og.get("content") if og else None) or h1 or None
 
-def html_to_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
     for tag in soup(["script", "style", "noscript"]):
         tag.decompose()
-    text = soup.get_text("\n")
-    lines = [l.strip() for l in text.splitlines() if l.strip()]
-    return "\n".join(lines)
+
+    lines = [l.strip() for l in soup.get_text("\n").splitlines()]
+    lines = [l for l in lines if l]
+
+    paragraphs = []
+    pos = 0
+    for l in lines:
+        paragraphs.append((pos, pos + len(l)))
+        pos += len(l) + 1  # "\n" separator
+
+    text = "\n".join(lines)
+    return {
+        "text": text,
+        "title": title,
+        "h1": h1,
+        "word_count": len(text.split()),
+        "paragraphs": paragraphs,
+    }
+
+
+def html_to_text(html: str) -> str:
+    return extract(html)["text"]
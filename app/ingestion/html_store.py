@@ -0,0 +1,95 @@
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime, timezone
+
+from app.registry import resource
+
+# off unless set: the store keeps every fetch and is never pruned, so on a
+# polling host it grows without bound. Set it (e.g. .cache/html_store) on
+# machines that need replay.
+STORE_DIR = os.getenv("HTML_STORE_DIR", "")
+
+
+class HtmlStore:
+    """
+    Local, content-addressed copy of every Substack response we fetch.
+
+    objects/ab/<sha256>.gz   gzip'd response body, keyed by its sha256
+    index/<host>.jsonl       one line per fetch: url, kind, fetched_at, sha256
+
+    Identical bodies fetched at different times share one object, so
+    re-fetching unchanged posts only appends an index line.
+    """
+
+    def __init__(self, root: str = STORE_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self._latest = {}  # host -> {url: record}
+
+    def _object_path(self, sha: str) -> str:
+        return os.path.join(self.root, "objects", sha[:2], f"{sha}.gz")
+
+    def _index_path(self, host: str) -> str:
+        return os.path.join(self.root, "index", f"{host}.jsonl")
+
+    def put(self, host: str, url: str, body: bytes, kind: str = "post") -> str:
+        sha = hashlib.sha256(body).hexdigest()
+        path = self._object_path(sha)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp, path)
+
+        record = {
+            "url": url,
+            "kind": kind,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+            "sha256": sha,
+        }
+        with self._lock:
+            index = self._index_path(host)
+            os.makedirs(os.path.dirname(index), exist_ok=True)
+            with open(index, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            if host in self._latest:
+                self._latest[host][url] = record
+        return sha
+
+    def get(self, sha: str) -> bytes:
+        with gzip.open(self._object_path(sha), "rb") as f:
+            return f.read()
+
+    def _load(self, host: str) -> dict:
+        with self._lock:
+            if host not in self._latest:
+                latest = {}
+                try:
+                    with open(self._index_path(host), encoding="utf-8") as f:
+                        for line in f:
+                            rec = json.loads(line)
+                            latest[rec["url"]] = rec  # later lines win
+                except FileNotFoundError:
+                    pass
+                self._latest[host] = latest
+            return self._latest[host]
+
+    def latest(self, host: str, url: str) -> bytes | None:
+        rec = self._load(host).get(url)
+        return self.get(rec["sha256"]) if rec else None
+
+    def urls(self, host: str, kind: str = "post") -> list[str]:
+        return [u for u, rec in self._load(host).items() if rec["kind"] == kind]
+
+
+@resource("html_store")
+def get_store() -> HtmlStore | None:
+    """
+    Shared store, or None unless HTML_STORE_DIR is set.
+    """
+    return HtmlStore(STORE_DIR) if STORE_DIR else None
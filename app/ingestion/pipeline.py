@@ -1,41 +1,72 @@
+import os
+import time
 import hashlib
+from collections import Counter
+from contextlib import nullcontext
 from datetime import datetime
+from threading import BoundedSemaphore, Lock
 from sqlalchemy.engine import Engine
 
+from app.db.engine import round_trips
 from app.db.queries import (
     upsert_author,
-    upsert_post_shell,
-    should_skip_processing,
-    upsert_post_content,
-    replace_chunks,
-    insert_analysis,
-    insert_belief_occurrences,
-    set_post_processed,
+    get_author_watermark,
+    advance_author_watermark,
+    upsert_post_shells,
+    get_post_states,
+    get_post_progress,
+    persist_post,
+    find_analysis_by_hash,
     get_author_analyses,
     upsert_author_profile,
 )
-from app.ingestion.substack_client import SubstackClient
-from app.ingestion.cleaner import html_to_text
-from app.ingestion.chunker import chunk_text
+from app.ingestion.substack_client import ARCHIVE_PAGE_SIZE, SubstackClient
+from app.ingestion.cleaner import extract
+from app.ingestion.chunker import chunk_spans
+from app.ingestion.stages import Stage, run_stages
 from app.ai.embeddings import embed_texts
-from app.ai.groq_analysis import analyze_article
+from app.ai.embedding_cache import normalize_text
+from app.ai.llm import INGEST
+from app.ai.model_store import EMBEDDING_MODEL_KEY
+from app.ai.groq_analysis import PROMPT_VERSION, analyze_article, article_prompt_hash
 from app.analysis.claim_extractor import extract_claims
 from app.analysis.author_profile import aggregate_topics, bias_stats, recurring_claims
-from bs4 import BeautifulSoup
 
+# staged mode: threads per stage, inbox size between stages, and how many
+# posts' chunks the embed stage folds into one encode call
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "1"))
+FETCH_CONCURRENCY = int(os.getenv("INGEST_FETCH_CONCURRENCY", "4"))
+CLEAN_CONCURRENCY = int(os.getenv("INGEST_CLEAN_CONCURRENCY", "2"))
+LLM_CONCURRENCY = int(os.getenv("INGEST_LLM_CONCURRENCY", "2"))
+DB_CONCURRENCY = int(os.getenv("INGEST_DB_CONCURRENCY", "4"))
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+EMBED_BATCH_POSTS = int(os.getenv("INGEST_EMBED_BATCH_POSTS", "8"))
+
+OUTCOMES = (
+    "processed",
+    "skipped_paywall",
+    "skipped_empty",
+    "skipped_unchanged",
+    "skipped_no_url",
+    "errors",
+)
 
-def extract_title_from_html(html: str, fallback: str | None):
-    soup = BeautifulSoup(html, "html.parser")
+# outcomes after which a post needs no further attention; the watermark
+# may move past these
+SETTLED = {
+    "processed",
+    "skipped_paywall",
+    "skipped_empty",
+    "skipped_unchanged",
+    "skipped_no_url",
+}
 
-    og = soup.find("meta", property="og:title")
-    if og and og.get("content"):
-        return og["content"]
+# per-post progress recorded in post_stages, in pipeline order
+STAGES = ("fetched", "cleaned", "chunked", "embedded", "analyzed", "claims")
 
-    h1 = soup.find("h1")
-    if h1 and h1.get_text(strip=True):
-        return h1.get_text(strip=True)
 
-    return fallback or "Untitled"
+def extract_title_from_html(html: str, fallback: str | None, parsed: dict | None = None):
+    return (parsed or extract(html))["title"] or fallback or "Untitled"
 
 
 def sha256_text(s: str) -> str:
@@ -48,179 +79,653 @@ def parse_subdomain(newsletter_url: str) -> str:
     return host.split(".")[0]
 
 
-def ingest_author(engine: Engine, newsletter_url: str, limit_posts: int = 10):
-    client = SubstackClient(newsletter_url)
-    subdomain = parse_subdomain(newsletter_url)
-
-    # Substack API doesn’t always provide author nicely; use subdomain as fallback
-    author_id = upsert_author(
-        engine, subdomain=subdomain, name=subdomain, description=None
+def parse_published_at(value):
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except Exception:
+            return None
+    return value
+
+
+def discover_posts(client, since: dict, limit: int):
+    """
+    Archive entries newer than the `since` watermark, oldest first, capped
+    at `limit`. Pages through the listing only until the first post at or
+    below the watermark, so an author with nothing new costs one call.
+    """
+    newer = []
+    offset = 0
+    while True:
+        page = client.get_archive_page(offset, ARCHIVE_PAGE_SIZE)
+        for p in page:
+            published = parse_published_at(p.post_date)
+            if p.slug == since.get("slug") or (
+                published is not None and published <= since["published_at"]
+            ):
+                # oldest first, so the watermark can advance through them in order
+                return newer[::-1][:limit]
+            newer.append(p)
+        if len(page) < ARCHIVE_PAGE_SIZE:
+            return newer[::-1][:limit]
+        offset += len(page)
+
+
+def watermark_after(items) -> dict | None:
+    """
+    The newest post of the oldest-first run of settled posts, or None if
+    the oldest one failed. Anything after a failure stays above the
+    watermark and is rediscovered next time.
+    """
+    mark = None
+    done = sorted(
+        (it for it in items if it["published_at"] is not None),
+        key=lambda it: it["published_at"],
     )
+    for it in done:
+        if (it.get("outcome") or "processed") not in SETTLED:
+            break
+        mark = {"published_at": it["published_at"], "slug": it["slug"]}
+    return mark
 
-    posts = client.get_posts(limit=limit_posts)
 
-    processed = 0
-    skipped_paywall = 0
-    skipped_empty = 0
-    skipped_unchanged = 0
-    skipped_no_url = 0
-    errors = 0
+def make_limits(concurrent: bool) -> dict:
+    if not concurrent:
+        return {"fetch": nullcontext(), "llm": nullcontext(), "db": nullcontext()}
+    return {
+        "fetch": BoundedSemaphore(FETCH_CONCURRENCY),
+        "llm": BoundedSemaphore(LLM_CONCURRENCY),
+        "db": BoundedSemaphore(DB_CONCURRENCY),
+    }
 
-    for p in posts:
-        try:
-            url = getattr(p, "url", None)
-            slug = getattr(p, "slug", None)
-            published_at = getattr(p, "post_date", None)
-
-            if not url:
-                skipped_no_url += 1
-                continue
-
-            # Normalize published_at
-            if isinstance(published_at, str):
-                try:
-                    published_at = datetime.fromisoformat(
-                        published_at.replace("Z", "+00:00")
-                    )
-                except Exception:
-                    published_at = None
-
-            # ---- Title: prefer metadata JSON endpoint (works even if HTML is paywalled) ----
-            title = None
-            try:
-                meta = client.get_post_metadata(
-                    url
-                )  # you add this method to SubstackClient
-                meta_title = meta.get("title")
-                if isinstance(meta_title, str) and meta_title.strip():
-                    title = meta_title.strip()
-            except Exception as e:
-                # don’t fail ingestion just because metadata failed
-                print(f"[warn] metadata fetch failed for {url}: {e}")
-
-            # absolute fallback to avoid NOT NULL title errors
-            if not title:
-                title = (slug or "Untitled").replace("-", " ").title()
-
-            # ---- Upsert shell early (title is always non-null now) ----
-            shell = upsert_post_shell(
-                engine,
-                author_id=author_id,
-                title=title,
-                url=url,
-                published_at=published_at,
-                slug=slug,
-                word_count=None,
+
+# ---------- per-post steps ----------
+# Each step reads/writes the post `item` dict and returns an outcome name to
+# stop early, or None to continue with the next step. Steps record finished
+# stages with _done; a stage an earlier run already finished for the same
+# input (_reusable) is taken from what that run stored instead of redone.
+
+
+def _reusable(item, stage: str, key: str | None = None) -> bool:
+    prev = (item.get("stages") or {}).get(stage) or {}
+    return bool(prev.get("done")) and (key is None or prev.get("key") == key)
+
+
+def _done(item, stage: str, key: str | None, ran: bool = True):
+    item.setdefault("done", {})[stage] = {"key": key, "ran": ran}
+
+
+def _fetch_post(ctx, item):
+    url = item["url"]
+
+    stored = (item.get("progress") or {}).get("html")
+    if stored and _reusable(item, "fetched"):
+        # an earlier run fetched this post and failed further down
+        item["html"] = stored
+        _done(item, "fetched", sha256_text(stored), ran=False)
+        return
+
+    # only trust a 304 if the stored content was fully processed last time
+    known = ctx["known"].get(url) or {}
+    conditional = ctx["conditional"] and bool(known.get("processed"))
+
+    try:
+        with ctx["limits"]["fetch"]:
+            data = ctx["client"].get_post(
+                url,
+                etag=known.get("etag") if conditional else None,
+                last_modified=known.get("last_modified") if conditional else None,
             )
-            post_id = shell["id"]
+    except Exception as e:
+        # keep going so the shell still gets a title; _check_html re-raises
+        print(f"[warn] post fetch failed for {url}: {e}")
+        item["fetch_error"] = e
+        data = {}
+
+    if data is None:
+        return "skipped_unchanged"
+
+    # ---- Title: prefer post JSON, then archive listing ----
+    title = None
+    for candidate in (data.get("title"), item.get("title")):
+        if isinstance(candidate, str) and candidate.strip():
+            title = candidate.strip()
+            break
+
+    item["title"] = title or fallback_title(item)
+    item["html"] = data.get("body_html")
+
+
+def fallback_title(item) -> str:
+    # absolute fallback to avoid NOT NULL title errors
+    return (item["slug"] or "Untitled").replace("-", " ").title()
+
+
+def _check_html(ctx, item):
+    if item.get("fetch_error"):
+        raise item["fetch_error"]
+
+    html = item["html"]
+
+    # Paywalled or unavailable: we keep the shell/title but skip content processing
+    if not html or "paywalled" in str(html).lower():
+        print(f"Skipping paywalled post: {item['title']}")
+        return "skipped_paywall"
+
+    if "fetched" not in item.get("done", {}):
+        _done(item, "fetched", sha256_text(html))
+
+
+def _clean(ctx, item):
+    parsed = extract(item["html"])
+    clean = parsed["text"]
+
+    if not clean.strip():
+        print(f"Skipping empty post: {item['title']}")
+        return "skipped_empty"
+
+    item["clean"] = clean
+    item["checksum"] = sha256_text(clean)
+    item["word_count"] = parsed["word_count"]
+    item["paragraphs"] = parsed["paragraphs"]
+    # cleaning and chunking are cheap and local, so they always rerun;
+    # their rows still carry attempts and errors
+    _done(item, "cleaned", item["done"]["fetched"]["key"])
+
+
+def _check_unchanged(ctx, item):
+    # checksum/processed were prefetched for the whole page
+    known = ctx["known"].get(item["url"]) or {}
+    if known.get("processed") and known.get("checksum") == item["checksum"]:
+        return "skipped_unchanged"
+
+
+def chunk_key(text: str) -> str:
+    # a stored vector is only valid for the model that produced it
+    return sha256_text(f"{EMBEDDING_MODEL_KEY}\n{normalize_text(text)}")
+
+
+def _plan_chunks(item):
+    """
+    Matches the new chunks to the post's stored rows by content hash. A
+    matched chunk keeps its row and vector; only unmatched chunks are
+    embedded and inserted, and stored rows nothing matched are deleted.
+    """
+    stored = {}
+    for row in item.get("stored_chunks") or []:
+        if row["hash"]:
+            stored.setdefault(row["hash"], []).append(row)
+
+    plan = []
+    for i, ((a, b), text) in enumerate(zip(item["spans"], item["chunks"])):
+        h = chunk_key(text)
+        row = stored[h].pop() if stored.get(h) else None
+        plan.append(
+            {
+                "id": row["id"] if row else None,
+                "index": i,
+                "start": a,
+                "end": b,
+                "hash": h,
+                "embedding": None,
+                "moved": row is not None and (row["index"], row["start"], row["end"]) != (i, a, b),
+            }
+        )
 
-            # ---- Fetch HTML for content/analysis ----
-            html = client.get_post_html(url)
+    kept = {c["id"] for c in plan if c["id"] is not None}
+    item["chunk_plan"] = plan
+    item["gone_chunk_ids"] = [
+        r["id"] for r in item.get("stored_chunks") or [] if r["id"] not in kept
+    ]
 
-            # Paywalled or unavailable: we keep the shell/title but skip content processing
-            if not html or "paywalled" in str(html).lower():
-                skipped_paywall += 1
-                print(f"Skipping paywalled post: {title}")
-                continue
 
-            clean = html_to_text(html)
+def _chunk(ctx, item):
+    clean = item["clean"]
+    item["spans"] = chunk_spans(clean, item["paragraphs"])
+    item["chunks"] = [clean[a:b] for a, b in item["spans"]]
+    _plan_chunks(item)
+    _done(item, "chunked", item["checksum"])
+    if not item["chunks"]:
+        _persist(ctx, item)
+        return "processed"
 
-            if not clean.strip():
-                skipped_empty += 1
-                print(f"Skipping empty post: {title}")
-                continue
 
-            checksum = sha256_text(clean)
+def _embed_key(item) -> str:
+    return sha256_text(f"{EMBEDDING_MODEL_KEY}|{item['checksum']}|{item['spans']}")
 
-            if should_skip_processing(engine, post_id, checksum):
-                skipped_unchanged += 1
-                continue
 
-            upsert_post_content(engine, post_id, raw_html=html, clean_text=clean)
+def _to_embed(item) -> list[dict]:
+    return [c for c in item["chunk_plan"] if c["id"] is None]
 
-            chunks = chunk_text(clean)
-            if not chunks:
-                set_post_processed(engine, post_id, checksum)
-                processed += 1
-                continue
 
-            embeddings = embed_texts(chunks)
-            replace_chunks(engine, post_id, chunks, embeddings)
+def _embedded(ctx, item, new: int):
+    _count(ctx, "chunks_embedded", new)
+    _count(ctx, "chunks_reused", len(item["chunk_plan"]) - new)
+    _done(item, "embedded", _embed_key(item), ran=bool(new))
 
-            # analyze once (you had this duplicated before)
-            analysis, model, phash = analyze_article(clean)
-            insert_analysis(engine, post_id, analysis, model, phash)
 
-            claims = extract_claims(analysis)
-            insert_belief_occurrences(engine, author_id, post_id, published_at, claims)
+def _embed(ctx, item):
+    todo = _to_embed(item)
+    if todo:
+        vectors = embed_texts([item["chunks"][c["index"]] for c in todo])
+        for c, v in zip(todo, vectors):
+            c["embedding"] = v
+    _embedded(ctx, item, len(todo))
 
-            set_post_processed(engine, post_id, checksum)
-            processed += 1
 
-            # optional debug prints
-            # print("RAW POST OBJECT:", getattr(p, "__dict__", p))
-            # print("URL:", url)
-            # print("SLUG:", slug)
-            # print("TITLE:", title)
+def _count(ctx, name: str, n: int = 1):
+    with ctx["stats_lock"]:
+        ctx["stats"][name] += n
 
-        except Exception as e:
-            errors += 1
-            print(f"[error] failed processing post {getattr(p, 'url', None)}: {e}")
 
-    # ---- Commit 1: materialize + cache author profile after ingestion ----
-    rows = get_author_analyses(engine, author_id)
-    if rows:
-        profile_summary = rows[0].get("summary")
-        beliefs = recurring_claims(rows)
-        topics = aggregate_topics(rows)
-        bias = bias_stats(rows)
-
-        upsert_author_profile(
-            engine,
-            author_id=author_id,
-            summary=profile_summary,
-            beliefs=beliefs,
-            topics=topics,
-            bias=bias,
+def _analyze(ctx, item):
+    # same prompt + model + text as a stored analysis -> reuse it, no tokens spent
+    phash = article_prompt_hash(item["clean"])
+    with ctx["limits"]["db"]:
+        stored = find_analysis_by_hash(ctx["engine"], phash, item["post_id"])
+
+    if stored:
+        item["analysis"], item["model"], item["phash"] = stored, stored["model"], phash
+        item["analysis_stored"] = stored["post_id"] == item["post_id"]
+        _count(ctx, "reused_analysis")
+        _done(item, "analyzed", phash, ran=False)
+        return
+
+    with ctx["limits"]["llm"]:
+        item["analysis"], item["model"], item["phash"] = analyze_article(
+            item["clean"], ctx["priority"], on_call=lambda: _count(ctx, "llm_calls")
+        )
+    _done(item, "analyzed", item["phash"])
+
+
+def _extract_claims(ctx, item):
+    phash = item["phash"]
+    # claims go in with the post's own analysis row; only a run that
+    # failed in between leaves that row without them
+    if item.get("analysis_stored") and (
+        not item.get("stages") or _reusable(item, "claims", phash)
+    ):
+        item["claims"] = None
+        _done(item, "claims", phash, ran=False)
+        return
+
+    item["claims"] = extract_claims(item["analysis"])
+    _done(item, "claims", phash)
+
+
+def _stage_rows(item, failed: str | None = None, error: str | None = None) -> list[dict]:
+    done = item.get("done", {})
+    rows = [{"stage": s, **done[s]} for s in STAGES if s in done]
+    if failed:
+        rows.append({"stage": failed, "ran": True, "error": error})
+    return rows
+
+
+def _persist(ctx, item):
+    # content, chunks, analysis, claims, stages and the processed flag: one transaction
+    v = ctx["client"].validators.get(item["url"]) or {}
+
+    # this post's own row (and its claims) were written when it was first analyzed
+    analysis = item.get("analysis") if not item.get("analysis_stored") else None
+
+    with ctx["limits"]["db"]:
+        persist_post(
+            ctx["engine"],
+            item["post_id"],
+            raw_html=item["html"],
+            clean_text=item["clean"],
+            checksum=item["checksum"],
+            word_count=item["word_count"],
+            title=item["title"],
+            etag=v.get("etag"),
+            last_modified=v.get("last_modified"),
+            chunks=item["chunk_plan"],
+            gone_chunk_ids=item["gone_chunk_ids"],
+            analysis=analysis,
+            model=item.get("model"),
+            prompt_hash=item.get("phash"),
+            prompt_version=PROMPT_VERSION,
+            author_id=ctx["author_id"],
+            occurred_at=item["published_at"],
+            claims=item.get("claims"),
+            stages=_stage_rows(item),
         )
 
+
+def _save_progress(ctx, item, stage: str, error: Exception):
+    """
+    After a failure at `stage`: stores what this run finished (new HTML,
+    embedded chunks, the analysis) and the failed stage's error, without
+    marking the post processed, so the next run starts at `stage`.
+    """
+    done = item.get("done", {})
+    analysis = item.get("analysis") if "analyzed" in done else None
+
+    try:
+        with ctx["limits"]["db"]:
+            persist_post(
+                ctx["engine"],
+                item["post_id"],
+                raw_html=item["html"] if "fetched" in done else None,
+                # stored chunks are offsets into the stored text, so new
+                # text only goes in together with its chunks
+                clean_text=item.get("clean") if "embedded" in done else None,
+                chunks=item["chunk_plan"] if "embedded" in done else None,
+                gone_chunk_ids=item.get("gone_chunk_ids"),
+                analysis=analysis if not item.get("analysis_stored") else None,
+                model=item.get("model"),
+                prompt_hash=item.get("phash"),
+                prompt_version=PROMPT_VERSION,
+                stages=_stage_rows(item, stage, f"{type(error).__name__}: {error}"[:2000]),
+                processed=False,
+            )
+    except Exception as e:
+        print(f"[warn] could not save progress for {item.get('url')}: {e}")
+
+
+def _fail(ctx, item, stage: str | None, error: Exception):
+    print(f"[error] failed processing post {item.get('url')}: {error}")
+    item["outcome"] = "errors"
+    if stage and item.get("post_id"):
+        _save_progress(ctx, item, stage, error)
+
+
+FETCH_STEPS = (_fetch_post, _check_html)
+CLEAN_STEPS = (_clean, _check_unchanged)
+
+POST_STEPS = (
+    *FETCH_STEPS,
+    *CLEAN_STEPS,
+    _chunk,
+    _embed,
+    _analyze,
+    _extract_claims,
+    _persist,
+)
+
+# stage a failure in each step is recorded against; a failed write in
+# _persist has nothing new to record
+STEP_STAGES = {
+    _fetch_post: "fetched",
+    _check_html: "fetched",
+    _clean: "cleaned",
+    _check_unchanged: "cleaned",
+    _chunk: "chunked",
+    _embed: "embedded",
+    _analyze: "analyzed",
+    _extract_claims: "claims",
+}
+
+
+def new_item(p) -> dict:
     return {
+        "url": getattr(p, "url", None),
+        "slug": getattr(p, "slug", None),
+        "title": getattr(p, "title", None),
+        "published_at": parse_published_at(getattr(p, "post_date", None)),
+    }
+
+
+def run_steps(ctx, item, steps) -> None:
+    """
+    Runs `steps` on one post until one of them returns an outcome, which is
+    recorded as item["outcome"]. Errors are recorded the same way.
+    """
+    for step in steps:
+        try:
+            outcome = step(ctx, item)
+        except Exception as e:
+            _fail(ctx, item, STEP_STAGES.get(step), e)
+            return
+        if outcome:
+            item["outcome"] = outcome
+            return
+
+
+def process_post(ctx, item) -> str:
+    if not item["url"]:
+        item["outcome"] = "skipped_no_url"
+    else:
+        run_steps(ctx, item, POST_STEPS)
+    return item.get("outcome") or "processed"
+
+
+# ---------- staged mode ----------
+
+
+def _embed_batch(ctx, items):
+    # one encode call for the new chunks of every post in the batch
+    live = []
+    for it in items:
+        run_steps(ctx, it, (_chunk,))
+        if not it.get("outcome"):
+            live.append(it)
+
+    todo = [(it, c) for it in live for c in _to_embed(it)]
+    if todo:
+        try:
+            vectors = embed_texts([it["chunks"][c["index"]] for it, c in todo])
+        except Exception as e:
+            print(f"[error] batched embedding failed: {e}")
+            for it in live:
+                _fail(ctx, it, "embedded", e)
+            return
+        for (_, c), v in zip(todo, vectors):
+            c["embedding"] = v
+
+    for it in live:
+        _embedded(ctx, it, len(_to_embed(it)))
+
+
+def build_stages(ctx) -> list[Stage]:
+    def steps(*fns):
+        return lambda items: [run_steps(ctx, it, fns) for it in items]
+
+    return [
+        Stage("fetch", steps(*FETCH_STEPS), FETCH_CONCURRENCY, QUEUE_SIZE),
+        Stage("clean", steps(*CLEAN_STEPS), CLEAN_CONCURRENCY, QUEUE_SIZE),
+        Stage(
+            "embed",
+            lambda items: _embed_batch(ctx, items),
+            1,
+            QUEUE_SIZE,
+            batch_size=EMBED_BATCH_POSTS,
+        ),
+        Stage("analyze", steps(_analyze, _extract_claims), LLM_CONCURRENCY, QUEUE_SIZE),
+        Stage("persist", steps(_persist), DB_CONCURRENCY, QUEUE_SIZE),
+    ]
+
+
+def run_staged(ctx, items) -> tuple[list[str], dict]:
+    outcomes = []
+    lock = Lock()
+
+    def on_done(item):
+        with lock:
+            outcomes.append(item.get("outcome") or "processed")
+
+    stage_stats = run_stages(build_stages(ctx), items, on_done)
+    return outcomes, stage_stats
+
+
+def ingest_items(
+    engine,
+    client,
+    author_id,
+    items,
+    workers: int,
+    replay: bool = False,
+    priority: int = INGEST,
+) -> dict:
+    """
+    Runs the per-post pipeline over `items` (from new_item) for one author:
+    serially for workers=1, staged otherwise. Each item gets its "outcome".
+    `priority` is the LLM scheduler priority for article analysis.
+    """
+    trips_before = round_trips()["total"]
+
+    # one query for what we already know about these posts, one statement
+    # for all their shells; per-post writes then happen in _persist only
+    urls = [it["url"] for it in items if it["url"]]
+    known = get_post_states(engine, author_id, urls)
+    for it in items:
+        it["title"] = it["title"] or fallback_title(it)
+    post_ids = upsert_post_shells(
+        engine, author_id, [it for it in items if it["url"]]
+    )
+
+    # posts an earlier run left unfinished resume from what it stored
+    fetched = [
+        k["id"]
+        for k in known.values()
+        if not k["processed"] and k.get("stages") and _reusable(k, "fetched")
+    ]
+    progress = get_post_progress(engine, fetched) if fetched else {}
+
+    for it in items:
+        it["post_id"] = post_ids.get(it["url"])
+        it["stages"] = (known.get(it["url"]) or {}).get("stages") or {}
+        it["progress"] = progress.get(it["post_id"]) or {}
+        it["stored_chunks"] = (known.get(it["url"]) or {}).get("chunks") or []
+
+    ctx = {
+        "engine": engine,
+        "client": client,
         "author_id": author_id,
-        "posts_seen": len(posts),
-        "processed": processed,
-        "skipped_paywall": skipped_paywall,
-        "skipped_empty": skipped_empty,
-        "skipped_unchanged": skipped_unchanged,
-        "skipped_no_url": skipped_no_url,
-        "errors": errors,
-        "profile_computed": bool(rows),
+        "limits": make_limits(workers > 1),
+        "known": known,
+        # replayed bodies are local anyway; never short-circuit them as 304s
+        "conditional": not replay,
+        "priority": priority,
+        "stats": Counter(),
+        "stats_lock": Lock(),
+    }
+
+    stage_stats = None
+
+    if workers > 1:
+        for it in items:
+            if not it["url"]:
+                it["outcome"] = "skipped_no_url"
+        outcomes = ["skipped_no_url" for it in items if not it["url"]]
+        more, stage_stats = run_staged(ctx, [it for it in items if it["url"]])
+        outcomes += more
+    else:
+        outcomes = [process_post(ctx, it) for it in items]
+
+    trips = round_trips()["total"] - trips_before
+
+    return {
+        "counts": Counter(outcomes),
+        "llm_calls": ctx["stats"]["llm_calls"],
+        "reused_analysis": ctx["stats"]["reused_analysis"],
+        "chunks_embedded": ctx["stats"]["chunks_embedded"],
+        "chunks_reused": ctx["stats"]["chunks_reused"],
+        # process-wide counter, so approximate when authors ingest concurrently
+        "db_round_trips_per_post": round(trips / len(items), 1) if items else None,
+        "stages": stage_stats,
     }
 
-    # ---- Commit 1: materialize + cache author profile after ingestion ----
+
+def refresh_author_profile(engine, author_id) -> bool:
+    # ---- materialize + cache author profile after ingestion ----
     rows = get_author_analyses(engine, author_id)
+    if not rows:
+        return False
+
+    upsert_author_profile(
+        engine,
+        author_id=author_id,
+        summary=rows[0].get("summary"),
+        beliefs=recurring_claims(rows),
+        topics=aggregate_topics(rows),
+        bias=bias_stats(rows),
+    )
+    return True
+
+
+def ingest_author(
+    engine: Engine,
+    newsletter_url: str,
+    limit_posts: int = 10,
+    workers: int | None = None,
+    replay: bool = False,
+    incremental: bool = False,
+):
+    """
+    workers=1 processes posts one at a time; workers>1 runs the staged
+    pipeline (fetch -> clean -> embed -> analyze -> persist), where each
+    stage has its own thread count and bounded inbox. Per-stage throughput
+    and queue depth come back under "stages".
+
+    replay=True reads the archive and posts from the local HtmlStore only,
+    for reprocessing after cleaner/chunker/prompt changes without touching
+    Substack.
+
+    incremental=True only looks at posts newer than the author's stored
+    watermark (up to limit_posts of them, oldest first); without a
+    watermark it falls back to the newest limit_posts.
+    """
+    workers = workers or INGEST_WORKERS
+    started = time.perf_counter()
+
+    client = SubstackClient(newsletter_url, replay=replay)
+    subdomain = parse_subdomain(newsletter_url)
 
-    if rows:
-        # NOTE: this is still "temporary summary" logic; commit 2+ will improve.
-        profile_summary = rows[0].get("summary")
-        beliefs = recurring_claims(rows)
-        topics = aggregate_topics(rows)
-        bias = bias_stats(rows)
-
-        upsert_author_profile(
-            engine,
-            author_id=author_id,
-            summary=profile_summary,
-            beliefs=beliefs,
-            topics=topics,
-            bias=bias,
-        )
+    # Substack API doesn’t always provide author nicely; use subdomain as fallback
+    author_id = upsert_author(
+        engine, subdomain=subdomain, name=subdomain, description=None
+    )
+
+    since = get_author_watermark(engine, author_id) if incremental else None
+    if since:
+        posts = discover_posts(client, since, limit_posts)
+    else:
+        posts = client.get_posts(limit=limit_posts)
+    items = [new_item(p) for p in posts]
+
+    if incremental and since and not items:
+        return {
+            "author_id": author_id,
+            "posts_seen": 0,
+            **{name: 0 for name in OUTCOMES},
+            "llm_calls": 0,
+            "reused_analysis": 0,
+            "chunks_embedded": 0,
+            "chunks_reused": 0,
+            "profile_computed": False,
+            "watermark": since,
+            "db_round_trips_per_post": None,
+            "workers": workers,
+            "elapsed_s": round(time.perf_counter() - started, 2),
+            "stages": None,
+        }
+    run = ingest_items(engine, client, author_id, items, workers, replay=replay)
+    counts = run["counts"]
+
+    # A full listing only proves there is no gap below it when there was no
+    # watermark yet; incremental discovery always starts right above it.
+    watermark = since
+    if since or get_author_watermark(engine, author_id) is None:
+        mark = watermark_after(items)
+        if mark:
+            advance_author_watermark(engine, author_id, mark["published_at"], mark["slug"])
+            watermark = mark
+
+    profile_computed = refresh_author_profile(engine, author_id)
 
     return {
         "author_id": author_id,
         "posts_seen": len(posts),
-        "processed": processed,
-        "skipped_paywall": skipped_paywall,
-        "skipped_empty": skipped_empty,
-        "skipped_unchanged": skipped_unchanged,
-        "profile_computed": bool(rows),
+        **{name: counts[name] for name in OUTCOMES},
+        "llm_calls": run["llm_calls"],
+        "reused_analysis": run["reused_analysis"],
+        "chunks_embedded": run["chunks_embedded"],
+        "chunks_reused": run["chunks_reused"],
+        "profile_computed": profile_computed,
+        "watermark": watermark,
+        "db_round_trips_per_post": run["db_round_trips_per_post"],
+        "workers": workers,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+        "stages": run["stages"],
     }
@@ -0,0 +1,77 @@
+"""
+Retry pass over posts whose last run failed part-way.
+
+Each post resumes from what its failed run stored (see post_stages): the
+HTML is not fetched again, stored chunk embeddings are reused, and an
+analysis that was already written is found by its prompt hash, so a retry
+only spends network, model and LLM time on the stages that never finished.
+"""
+
+import os
+import time
+from collections import Counter
+
+from sqlalchemy.engine import Engine
+
+from app.db.queries import list_failed_posts
+from app.ingestion.pipeline import (
+    INGEST_WORKERS,
+    OUTCOMES,
+    ingest_items,
+    refresh_author_profile,
+)
+from app.ingestion.substack_client import SubstackClient
+
+# a post failing this often at one stage needs a human, not another retry
+RETRY_MAX_ATTEMPTS = int(os.getenv("POST_RETRY_MAX_ATTEMPTS", "5"))
+
+
+def retry_failed_posts(
+    engine: Engine,
+    author_id: int | None = None,
+    limit: int = 50,
+    max_attempts: int = RETRY_MAX_ATTEMPTS,
+    workers: int | None = None,
+    replay: bool = False,
+):
+    workers = workers or INGEST_WORKERS
+    started = time.perf_counter()
+
+    by_author = {}
+    for row in list_failed_posts(engine, author_id, max_attempts, limit):
+        by_author.setdefault((row["author_id"], row["subdomain"]), []).append(row)
+
+    results = []
+    for (aid, subdomain), rows in by_author.items():
+        client = SubstackClient(f"https://{subdomain}.substack.com", replay=replay)
+        items = [
+            {
+                "url": r["url"],
+                "slug": r["slug"],
+                "title": r["title"],
+                "published_at": r["published_at"],
+            }
+            for r in rows
+        ]
+        run = ingest_items(engine, client, aid, items, workers, replay)
+        counts = run["counts"]
+
+        results.append(
+            {
+                "author_id": aid,
+                "posts": len(rows),
+                "failed_stages": dict(Counter(r["failed_stage"] for r in rows)),
+                **{name: counts[name] for name in OUTCOMES},
+                "llm_calls": run["llm_calls"],
+                "reused_analysis": run["reused_analysis"],
+                "profile_computed": refresh_author_profile(engine, aid)
+                if counts["processed"]
+                else False,
+            }
+        )
+
+    return {
+        "authors": results,
+        "posts": sum(r["posts"] for r in results),
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,154 @@
+import time
+import queue
+import threading
+
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline stage: `workers` threads pull from a bounded inbox and call
+    `handler(items)` on batches of up to `batch_size` items. Items that come
+    back without an "outcome" move on to the next stage; a full inbox blocks
+    the upstream stage (backpressure).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler,
+        workers: int = 1,
+        queue_size: int = 8,
+        batch_size: int = 1,
+        batch_wait: float = 0.05,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_wait = batch_wait
+        self.inbox = queue.Queue(maxsize=queue_size)
+
+        self._lock = threading.Lock()
+        self._alive = 0
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.busy_s = 0.0
+        self.blocked_s = 0.0
+        self.max_depth = 0
+
+    def put(self, item):
+        self.inbox.put(item)
+        depth = self.inbox.qsize()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+
+    def _next_batch(self):
+        first = self.inbox.get()
+        if first is _DONE:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.batch_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self.inbox.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _DONE:
+                # hand the stop marker back for a sibling worker (or ourselves)
+                self.inbox.put(_DONE)
+                break
+            batch.append(item)
+        return batch
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "batches": self.batches,
+            "busy_s": round(self.busy_s, 3),
+            "items_per_busy_s": round(self.items_in / self.busy_s, 2)
+            if self.busy_s
+            else None,
+            "blocked_downstream_s": round(self.blocked_s, 3),
+            "queue_depth": self.inbox.qsize(),
+            "max_queue_depth": self.max_depth,
+        }
+
+
+def run_stages(stages: list[Stage], items, on_done) -> dict:
+    """
+    Feeds `items` through `stages` in order. `on_done(item)` is called once
+    per item, from a stage thread, when it finishes or drops out early.
+    Returns per-stage stats keyed by stage name.
+    """
+
+    def worker(idx: int):
+        stage = stages[idx]
+        nxt = stages[idx + 1] if idx + 1 < len(stages) else None
+
+        while True:
+            batch = stage._next_batch()
+            if batch is None:
+                break
+
+            t0 = time.perf_counter()
+            try:
+                stage.handler(batch)
+            except Exception as e:
+                print(f"[error] stage {stage.name} failed: {e}")
+                for item in batch:
+                    item.setdefault("outcome", "errors")
+            t1 = time.perf_counter()
+
+            forward = []
+            for item in batch:
+                if item.get("outcome") or nxt is None:
+                    on_done(item)
+                else:
+                    forward.append(item)
+
+            for item in forward:
+                nxt.put(item)
+            t2 = time.perf_counter()
+
+            with stage._lock:
+                stage.items_in += len(batch)
+                stage.items_out += len(forward)
+                stage.batches += 1
+                stage.busy_s += t1 - t0
+                stage.blocked_s += t2 - t1
+
+        # last worker out tells the next stage to stop
+        with stage._lock:
+            stage._alive -= 1
+            last = stage._alive == 0
+        if last and nxt is not None:
+            for _ in range(nxt.workers):
+                nxt.inbox.put(_DONE)
+
+    threads = []
+    for idx, stage in enumerate(stages):
+        stage._alive = stage.workers
+        for n in range(stage.workers):
+            t = threading.Thread(
+                target=worker, args=(idx,), name=f"{stage.name}-{n}", daemon=True
+            )
+            t.start()
+            threads.append(t)
+
+    head = stages[0]
+    for item in items:
+        head.put(item)
+    for _ in range(head.workers):
+        head.inbox.put(_DONE)
+
+    for t in threads:
+        t.join()
+
+    return {s.name: s.stats() for s in stages}
@@ -1,21 +1,203 @@
-from substack_api import Newsletter, Post
+import os
+import json
+import time
+import random
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from app.ingestion.html_store import HtmlStore, get_store
+from app.registry import resource
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; SubstackAnalysis/1.0)",
+    "Accept": "application/json",
+}
+
+CONNECT_TIMEOUT = float(os.getenv("SUBSTACK_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("SUBSTACK_READ_TIMEOUT", "20"))
+POOL_PER_HOST = int(os.getenv("SUBSTACK_POOL_PER_HOST", "4"))
+MAX_RETRIES = int(os.getenv("SUBSTACK_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("SUBSTACK_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = 30.0
+ARCHIVE_PAGE_SIZE = 12
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+@resource("substack_session")
+def get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session. pool_block caps open connections per
+    host at SUBSTACK_POOL_PER_HOST; extra callers wait for a free one.
+    """
+    s = requests.Session()
+    s.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=POOL_PER_HOST, pool_block=True)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def _backoff(attempt: int, resp: requests.Response | None) -> float:
+    retry_after = resp.headers.get("Retry-After") if resp is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX)
+    # full jitter
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+def http_get(url: str, params=None, headers=None) -> requests.Response:
+    """
+    GET through the shared session, retrying 429/5xx and connection errors
+    with jittered exponential backoff. Returns the final response; callers
+    decide what to do with non-2xx statuses.
+    """
+    session = get_session()
+
+    for attempt in range(MAX_RETRIES + 1):
+        resp = None
+        try:
+            resp = session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+            )
+            if resp.status_code not in RETRY_STATUSES:
+                return resp
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+
+        if attempt == MAX_RETRIES:
+            return resp
+
+        delay = _backoff(attempt, resp)
+        print(f"[warn] retrying {url} in {delay:.1f}s (attempt {attempt + 1})")
+        time.sleep(delay)
+
+
+class ReplayMiss(LookupError):
+    pass
 
 
 class SubstackClient:
-    def __init__(self, newsletter_url: str):
-        self.newsletter_url = newsletter_url
-        self.nl = Newsletter(newsletter_url)
+    """
+    Every successful response is written through to the local HtmlStore.
+    With replay=True nothing touches the network: the archive and posts
+    are served from that store instead.
+    """
+
+    def __init__(
+        self, newsletter_url: str, replay: bool = False, store: HtmlStore | None = None
+    ):
+        self.newsletter_url = newsletter_url.rstrip("/")
+        self.host = urlparse(self.newsletter_url).netloc
+        self.replay = replay
+        self.store = store or get_store()
+        if replay and self.store is None:
+            raise ValueError("replay mode needs HTML_STORE_DIR")
+        # url -> {"etag", "last_modified"} from the latest 200 response
+        self.validators = {}
+        self._replayed = None
+
+    def _keep(self, url: str, body: bytes, kind: str):
+        if self.store is not None:
+            try:
+                self.store.put(self.host, url, body, kind)
+            except OSError as e:
+                print(f"[warn] html store write failed for {url}: {e}")
+
+    # ---------- archive ----------
 
     def get_posts(self, limit=20):
-        return self.nl.get_posts(limit=limit)
+        posts = []
+        offset = 0
+        while len(posts) < limit:
+            page = self.get_archive_page(offset, min(ARCHIVE_PAGE_SIZE, limit - len(posts)))
+            if not page:
+                break
+            posts.extend(page)
+            offset += len(page)
+        return posts[:limit]
 
-    def get_post_html(self, url: str) -> str | None:
-        return Post(url).get_content()  # may return paywall message
+    def get_archive_page(self, offset: int, limit: int = ARCHIVE_PAGE_SIZE):
+        if self.replay:
+            items = self._replay_archive()[offset : offset + limit]
+        else:
+            r = http_get(
+                f"{self.newsletter_url}/api/v1/archive",
+                params={"sort": "new", "search": "", "offset": offset, "limit": limit},
+            )
+            r.raise_for_status()
+            self._keep(r.url, r.content, "archive")
+            items = r.json()
 
-    def get_post_metadata(self, url: str) -> dict:
-        p = Post(url)
-        # p.endpoint is already in your debug output
-        r = requests.get(p.endpoint, timeout=15)
+        return [
+            SimpleNamespace(
+                url=item.get("canonical_url"),
+                slug=item.get("slug"),
+                post_date=item.get("post_date"),
+                title=item.get("title"),
+            )
+            for item in items
+        ]
+
+    def _replay_archive(self) -> list[dict]:
+        # newest first, like the live archive endpoint
+        if self._replayed is None:
+            posts = []
+            for url in self.store.urls(self.host, "post"):
+                data = json.loads(self.store.latest(self.host, url))
+                data["canonical_url"] = url  # the key get_post will look up
+                posts.append(data)
+            posts.sort(key=lambda d: d.get("post_date") or "", reverse=True)
+            self._replayed = posts
+        return self._replayed
+
+    # ---------- posts ----------
+
+    @staticmethod
+    def post_endpoint(url: str) -> str:
+        parsed = urlparse(url)
+        slug = parsed.path.strip("/").split("/")[-1]
+        return f"{parsed.scheme}://{parsed.netloc}/api/v1/posts/{slug}"
+
+    def get_post(
+        self, url: str, etag: str | None = None, last_modified: str | None = None
+    ) -> dict | None:
+        """
+        Post JSON (title, body_html, ...). With validators from a previous
+        fetch this is a conditional GET and returns None on 304.
+        """
+        if self.replay:
+            body = self.store.latest(self.host, url)
+            if body is None:
+                raise ReplayMiss(f"{url} is not in the html store")
+            return json.loads(body)
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        r = http_get(self.post_endpoint(url), headers=headers or None)
+        if r.status_code == 304:
+            return None
         r.raise_for_status()
+
+        self.validators[url] = {
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+        }
+        self._keep(url, r.content, "post")
         return r.json()
+
+    def get_post_html(self, url: str) -> str | None:
+        return self.get_post(url).get("body_html")  # may return paywall message
+
+    def get_post_metadata(self, url: str) -> dict:
+        return self.get_post(url)
@@ -1,18 +1,12 @@
-from bs4 import BeautifulSoup
+from app.ingestion.cleaner import extract
 
 
-def extract_title_from_html(html: str) -> str | None:
+def extract_title_from_html(html: str, parsed: dict | None = None) -> str | None:
     if not html:
         return None
 
-    soup = BeautifulSoup(html, "html.parser")
-
     # Substack titles are always inside first h1
-    h1 = soup.find("h1")
-    if not h1:
-        return None
-
-    text = h1.get_text(strip=True)
+    text = (parsed or extract(html))["h1"]
     if not text:
         return None
 
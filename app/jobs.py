@@ -0,0 +1,285 @@
+"""
+Job kinds and the worker loop that drains the jobs table.
+
+Endpoints enqueue with submit() and return the job id right away; workers
+run the job later:
+
+    python -m app.jobs
+
+Any number of these processes, on any number of machines, can share one
+queue. Each runs JOB_CONCURRENCY jobs at a time, keeps their leases alive
+with heartbeats, retries failures with backoff, and never runs two jobs
+for the same author at once.
+"""
+
+import os
+import random
+import signal
+import socket
+import threading
+import traceback
+
+from sqlalchemy.engine import Engine
+
+from app.db.engine import get_engine
+from app.db.jobs import claim_job, enqueue_job, fail_job, finish_job, heartbeat_job
+
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+JOB_LEASE_S = int(os.getenv("JOB_LEASE_S", "120"))
+JOB_HEARTBEAT_S = float(os.getenv("JOB_HEARTBEAT_S", "20"))
+JOB_POLL_S = float(os.getenv("JOB_POLL_S", "2"))
+JOB_RETRY_BASE_S = float(os.getenv("JOB_RETRY_BASE_S", "30"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# kind -> handler(engine, params, progress) -> JSON-serializable result
+_handlers = {}
+
+
+def handler(kind: str):
+    def deco(fn):
+        _handlers[kind] = fn
+        return fn
+
+    return deco
+
+
+def author_lock(author_id: int) -> str:
+    return f"author:{author_id}"
+
+
+def submit(
+    engine: Engine,
+    kind: str,
+    params: dict | None = None,
+    author_id: int | None = None,
+    priority: int = 0,
+) -> dict:
+    """
+    Queues a `kind` job. Jobs for one author are serialized; jobs without
+    an author are serialized per kind.
+    """
+    if kind not in _handlers:
+        raise ValueError(f"unknown job kind: {kind}")
+    lock_key = author_lock(author_id) if author_id is not None else kind
+    job = enqueue_job(
+        engine, kind, params, lock_key=lock_key, priority=priority, max_attempts=JOB_MAX_ATTEMPTS
+    )
+    return {"job_id": job["id"], "status": job["status"]}
+
+
+def submit_ingest(engine: Engine, kind: str, url: str, priority: int = 0, **params) -> dict:
+    # resolve the author now so the job is serialized with that author's other jobs
+    from app.db.queries import upsert_author
+    from app.ingestion.pipeline import parse_subdomain
+
+    subdomain = parse_subdomain(url)
+    author_id = upsert_author(engine, subdomain=subdomain, name=subdomain, description=None)
+    return submit(engine, kind, {"url": url, **params}, author_id=author_id, priority=priority)
+
+
+# ---------- job kinds ----------
+
+
+@handler("ingest_author")
+def _ingest_author(engine, params, progress):
+    from app.ingestion.pipeline import ingest_author
+
+    return ingest_author(
+        engine,
+        params["url"],
+        limit_posts=params.get("limit", 10),
+        replay=params.get("replay", False),
+        incremental=params.get("incremental", False),
+    )
+
+
+@handler("backfill")
+def _backfill(engine, params, progress):
+    from app.ingestion.backfill import backfill_author
+
+    return backfill_author(
+        engine,
+        params["url"],
+        max_seconds=params.get("max_seconds"),
+        max_llm_calls=params.get("max_llm_calls"),
+        replay=params.get("replay", False),
+        restart=params.get("restart", False),
+        progress=progress,
+    )
+
+
+@handler("retry_failed_posts")
+def _retry_failed_posts(engine, params, progress):
+    from app.ingestion.retry import retry_failed_posts
+
+    return retry_failed_posts(
+        engine, author_id=params.get("author_id"), limit=params.get("limit", 50)
+    )
+
+
+@handler("reanalyze")
+def _reanalyze(engine, params, progress):
+    from app.analysis.reanalyze import reanalyze_stale_posts
+
+    return reanalyze_stale_posts(
+        engine, author_id=params.get("author_id"), limit=params.get("limit", 20)
+    )
+
+
+@handler("backfill_beliefs")
+def _backfill_beliefs(engine, params, progress):
+    from app.analysis.backfill_beliefs import backfill_author_beliefs
+
+    return backfill_author_beliefs(engine, params["author_id"])
+
+
+@handler("embed_claims")
+def _embed_claims(engine, params, progress):
+    from app.analysis.embed_claims import embed_missing_claims
+
+    return {"embedded": embed_missing_claims(engine)}
+
+
+@handler("classify_claims")
+def _classify_claims(engine, params, progress):
+    from app.analysis.classify_claims import classify_missing_claims
+
+    return classify_missing_claims(engine)
+
+
+@handler("build_beliefs")
+def _build_beliefs(engine, params, progress):
+    from app.analysis.build_beliefs import build_author_beliefs
+
+    return build_author_beliefs(engine, params["author_id"], rebuild=params.get("rebuild", False))
+
+
+@handler("build_relations")
+def _build_relations(engine, params, progress):
+    from app.analysis.belief_relations import build_relations
+    from app.db.cached_profiles import upsert_cached_profile
+    from app.db.queries import get_author_profile
+
+    author_id = params["author_id"]
+    result = build_relations(engine, author_id)
+
+    profile = get_author_profile(engine, author_id)
+    if profile:
+        upsert_cached_profile(engine, author_id, profile)
+
+    return result
+
+
+@handler("belief_changes")
+def _belief_changes(engine, params, progress):
+    from app.analysis.belief_drift import update_belief_changes
+
+    return update_belief_changes(engine, params["author_id"])
+
+
+# ---------- worker loop ----------
+
+
+def _retry_delay(attempt: int) -> float:
+    return random.uniform(0.5, 1.0) * JOB_RETRY_BASE_S * 2 ** (attempt - 1)
+
+
+def run_job(engine: Engine, job: dict, worker_id: str):
+    """
+    Runs one leased job to completion, heartbeating while it runs, and
+    records the result or the failure.
+    """
+    latest = [None]
+    done = threading.Event()
+
+    def progress(update: dict):
+        # stored with the next heartbeat, so reporting costs no round trips
+        latest[0] = dict(update)
+
+    def beat():
+        while not done.wait(JOB_HEARTBEAT_S):
+            try:
+                if not heartbeat_job(engine, job["id"], worker_id, JOB_LEASE_S, latest[0]):
+                    print(f"[warn] job {job['id']} lost its lease; another worker may rerun it")
+                    return
+            except Exception as e:
+                print(f"[warn] heartbeat for job {job['id']} failed: {e}")
+
+    beater = threading.Thread(target=beat, name=f"job-{job['id']}-heartbeat", daemon=True)
+    beater.start()
+    try:
+        result = _handlers[job["kind"]](engine, job["params"] or {}, progress)
+    except Exception as e:
+        done.set()
+        traceback.print_exc()
+        status = fail_job(
+            engine,
+            job["id"],
+            worker_id,
+            f"{type(e).__name__}: {e}"[:2000],
+            _retry_delay(job["attempts"]),
+        )
+        print(f"[error] job {job['id']} ({job['kind']}) attempt {job['attempts']}: {e} -> {status}")
+        return
+    done.set()
+    finish_job(engine, job["id"], worker_id, result, latest[0])
+
+
+def start_job_workers(
+    engine: Engine | None = None,
+    concurrency: int = JOB_CONCURRENCY,
+    stop: threading.Event | None = None,
+    kinds: list[str] | None = None,
+) -> list[threading.Thread]:
+    """
+    Starts `concurrency` threads that each lease and run one job at a time
+    until `stop` is set; a running job is finished first.
+    """
+    engine = engine or get_engine()
+    stop = stop or threading.Event()
+    host = f"{socket.gethostname()}:{os.getpid()}"
+
+    def loop(slot: int):
+        worker_id = f"{host}:{slot}"
+        while not stop.is_set():
+            try:
+                job = claim_job(engine, worker_id, JOB_LEASE_S, kinds)
+            except Exception as e:
+                print(f"[warn] job claim failed: {e}")
+                job = None
+            if job is None:
+                stop.wait(JOB_POLL_S)
+                continue
+            if job["kind"] not in _handlers:
+                fail_job(engine, job["id"], worker_id, f"unknown job kind: {job['kind']}", 0)
+                continue
+            run_job(engine, job, worker_id)
+
+    threads = [
+        threading.Thread(target=loop, args=(i,), name=f"job-worker-{i}", daemon=True)
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    threads = start_job_workers(stop=stop)
+    print(f"job workers: {len(threads)} running")
+    stop.wait()
+    for t in threads:
+        t.join()
+    get_engine().dispose()
+
+
+if __name__ == "__main__":
+    main()
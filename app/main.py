@@ -3,25 +3,47 @@ from dotenv import load_dotenv
 load_dotenv()  # must be first line
 
 import os
+from contextlib import asynccontextmanager
+import threading
 from fastapi import FastAPI, Header, HTTPException
-from app.worker import run_ingestion
-from app.db.engine import get_engine
+from app import registry
+from app.db.engine import get_engine, pool_metrics
+from app.db.jobs import get_job, queue_stats
+from app.jobs import start_job_workers, submit, submit_ingest
 from app.db.queries import (
-    list_author_urls,
-    search_post_chunks,
     list_authors,
+    search_post_chunks,
     list_posts_for_author,
     get_post,
     get_author_analyses,
-    get_author_profile,
 )
 from app.ai.chat import answer_question
-from app.ai.embeddings import embed_texts
+from app.ai.embeddings import embed_texts, embedding_cache_stats
 from fastapi.middleware.cors import CORSMiddleware
-from app.analysis.backfill_beliefs import backfill_author_beliefs
-from app.db.cached_profiles import upsert_cached_profile
 
-app = FastAPI()
+# job workers inside the API process; set to 0 when separate
+# `python -m app.jobs` processes drain the queue
+API_JOB_WORKERS = int(os.getenv("API_JOB_WORKERS", "1"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # one pooled engine for the whole process, built before the first request
+    stop = threading.Event()
+    workers = []
+    if os.getenv("DATABASE_URL"):
+        engine = get_engine()
+        if API_JOB_WORKERS:
+            workers = start_job_workers(engine, API_JOB_WORKERS, stop)
+    yield
+    stop.set()
+    for t in workers:
+        t.join(timeout=30)
+    if "db_engine" in registry.loaded():
+        get_engine().dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,20 +72,77 @@ def health():
 
 @app.post("/ingest/author")
 def ingest_author_endpoint(
-    url: str, x_api_key: str | None = Header(default=None, alias="x-api-key")
+    url: str,
+    replay: bool = False,
+    x_api_key: str | None = Header(default=None, alias="x-api-key"),
 ):
     verify(x_api_key)
-    return run_ingestion([url])
+    return submit_ingest(get_engine(), "ingest_author", url, replay=replay)
 
 
 @app.post("/ingest/update")
-def ingest_all(x_api_key: str | None = Header(default=None, alias="x-api-key")):
+def ingest_all(
+    replay: bool = False,
+    x_api_key: str | None = Header(default=None, alias="x-api-key"),
+):
     verify(x_api_key)
 
     engine = get_engine()
-    urls = list_author_urls(engine)
 
-    return run_ingestion(urls, limit=5)
+    # one job per author so workers can run authors in parallel; each only
+    # looks at posts newer than the author's watermark
+    jobs = [
+        submit(
+            engine,
+            "ingest_author",
+            {
+                "url": f"https://{a['subdomain']}.substack.com",
+                "limit": 5,
+                "replay": replay,
+                "incremental": True,
+            },
+            author_id=a["id"],
+        )
+        for a in list_authors(engine)
+    ]
+    return {"jobs": jobs}
+
+
+@app.post("/ingest/backfill")
+def ingest_backfill(
+    url: str,
+    max_seconds: float | None = None,
+    max_llm_calls: int | None = None,
+    replay: bool = False,
+    restart: bool = False,
+    x_api_key: str | None = Header(default=None, alias="x-api-key"),
+):
+    verify(x_api_key)
+
+    # whole archive, resumable: enqueue again to continue from the saved cursor
+    return submit_ingest(
+        get_engine(),
+        "backfill",
+        url,
+        priority=1,
+        max_seconds=max_seconds,
+        max_llm_calls=max_llm_calls,
+        replay=replay,
+        restart=restart,
+    )
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: int):
+    job = get_job(get_engine(), job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/admin/jobs")
+def jobs_overview():
+    return queue_stats(get_engine())
 
 
 from pydantic import BaseModel
@@ -78,15 +157,16 @@ def ask(post_id: int, payload: Question):
     question = payload.question
     engine = get_engine()
 
-    query_vec = embed_texts(question)
-    contexts = search_post_chunks(engine, post_id, query_vec)
+    query_vec = embed_texts([question])[0]
+    sources = search_post_chunks(engine, post_id, query_vec)
 
-    if not contexts:
+    if not sources:
         return {"answer": "No content available for this article yet."}
 
-    answer = answer_question(question, contexts)
+    answer = answer_question(question, [s["content"] for s in sources])
 
-    return {"answer": answer, "sources": contexts}
+    # start/end let the client highlight each source in the article text
+    return {"answer": answer, "sources": sources}
 
 
 @app.get("/authors")
@@ -166,56 +246,129 @@ def compare(author_a: int, author_b: int):
     }
 
 
-@app.post("/admin/backfill_beliefs/{author_id}")
-def backfill(author_id: int):
+@app.get("/admin/embedding_cache")
+def embedding_cache():
+    return embedding_cache_stats()
+
+
+@app.get("/admin/db_pool")
+def db_pool():
+    return pool_metrics()
+
+
+@app.get("/admin/llm_stats")
+def llm_stats_api():
+    from app.ai.llm import llm_stats
+
+    return llm_stats()
+
+
+@app.get("/admin/reanalysis_plan")
+def reanalysis_plan_api():
+    from app.ai.groq_analysis import MODEL, PROMPT_VERSION
+    from app.db.queries import reanalysis_plan
+
     engine = get_engine()
-    return backfill_author_beliefs(engine, author_id)
+    return {
+        "model": MODEL,
+        "prompt_version": PROMPT_VERSION,
+        "authors": reanalysis_plan(engine, MODEL, PROMPT_VERSION),
+    }
 
 
-@app.post("/admin/embed_claims")
-def embed_claims():
+def _per_author_jobs(engine, kind: str, author_ids: list[int], params: dict) -> dict:
+    # one job per author, so each run holds that author's lock
+    jobs = [
+        {"author_id": a, **submit(engine, kind, {**params, "author_id": a}, author_id=a)}
+        for a in author_ids
+    ]
+    return {"jobs": jobs}
+
+
+@app.post("/admin/reanalyze")
+def reanalyze_api(author_id: int | None = None, limit: int = 20):
+    # without author_id: up to `limit` posts for each author with stale analyses
     engine = get_engine()
-    from app.analysis.embed_claims import embed_missing_claims
+    if author_id is not None:
+        return submit(
+            engine, "reanalyze", {"author_id": author_id, "limit": limit}, author_id=author_id
+        )
 
-    return {"embedded": embed_missing_claims(engine)}
+    from app.ai.groq_analysis import MODEL, PROMPT_VERSION
+    from app.db.queries import reanalysis_plan
 
+    stale = [a["author_id"] for a in reanalysis_plan(engine, MODEL, PROMPT_VERSION) if a["stale"]]
+    return _per_author_jobs(engine, "reanalyze", stale, {"limit": limit})
 
-@app.post("/admin/build_beliefs/{author_id}")
-def build_beliefs(author_id: int):
+
+@app.post("/admin/retry_failed_posts")
+def retry_failed_posts_api(author_id: int | None = None, limit: int = 50):
+    # without author_id: up to `limit` posts for each author with failed posts
     engine = get_engine()
-    from app.analysis.build_beliefs import build_author_beliefs
+    if author_id is not None:
+        return submit(
+            engine,
+            "retry_failed_posts",
+            {"author_id": author_id, "limit": limit},
+            author_id=author_id,
+        )
+
+    from app.db.queries import list_failed_authors
+    from app.ingestion.retry import RETRY_MAX_ATTEMPTS
 
-    return build_author_beliefs(engine, author_id)
+    failed = list_failed_authors(engine, RETRY_MAX_ATTEMPTS)
+    return _per_author_jobs(engine, "retry_failed_posts", failed, {"limit": limit})
+
+
+@app.post("/admin/backfill_beliefs/{author_id}")
+def backfill(author_id: int):
+    return submit(
+        get_engine(), "backfill_beliefs", {"author_id": author_id}, author_id=author_id
+    )
+
+
+@app.post("/admin/embed_claims")
+def embed_claims():
+    return submit(get_engine(), "embed_claims")
+
+
+@app.post("/admin/build_beliefs/{author_id}")
+def build_beliefs(author_id: int, rebuild: bool = False):
+    return submit(
+        get_engine(),
+        "build_beliefs",
+        {"author_id": author_id, "rebuild": rebuild},
+        author_id=author_id,
+    )
 
 
 @app.post("/admin/classify_claims")
 def classify_claims():
-    engine = get_engine()
-    from app.analysis.classify_claims import classify_missing_claims
-
-    return classify_missing_claims(engine)
+    return submit(get_engine(), "classify_claims")
 
 
 @app.post("/admin/build_relations/{author_id}")
 def build_relations_api(author_id: int):
-    engine = get_engine()
-    from app.analysis.belief_relations import build_relations
+    return submit(
+        get_engine(), "build_relations", {"author_id": author_id}, author_id=author_id
+    )
 
-    result = build_relations(engine, author_id)
 
-    profile = get_author_profile(engine, author_id)
-    if profile:
-        upsert_cached_profile(engine, author_id, profile)
+@app.get("/authors/{author_id}/evolution")
+def evolution(author_id: int, min_confidence: float = 0.0):
+    engine = get_engine()
+    from app.analysis.belief_drift import get_belief_changes
 
-    return result
+    return get_belief_changes(engine, author_id, min_confidence)
 
 
-@app.get("/authors/{author_id}/evolution")
-def evolution(author_id: int):
+@app.post("/admin/evolution/{author_id}")
+def evolution_update(author_id: int):
     engine = get_engine()
-    from app.analysis.belief_drift import detect_belief_changes
+    from app.analysis.belief_drift import last_belief_change_run
 
-    return detect_belief_changes(engine, author_id)
+    job = submit(engine, "belief_changes", {"author_id": author_id}, author_id=author_id)
+    return {**job, "last_run": last_belief_change_run(engine, author_id)}
 
 
 @app.post("/authors/{author_id}/ask")
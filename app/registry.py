@@ -0,0 +1,43 @@
+import threading
+
+# name -> zero-arg factory; instances are built on first use and shared
+_factories = {}
+_instances = {}
+_lock = threading.RLock()
+
+
+def register(name: str, factory):
+    _factories[name] = factory
+
+
+def get(name: str):
+    inst = _instances.get(name)
+    if inst is not None:
+        return inst
+    with _lock:
+        if name not in _instances:
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+def resource(name: str):
+    """
+    Decorator: registers `factory` under `name` and replaces it with an
+    accessor that builds the resource once, on first call, process-wide.
+    """
+
+    def deco(factory):
+        register(name, factory)
+
+        def accessor():
+            return get(name)
+
+        accessor.__name__ = factory.__name__
+        accessor.__doc__ = factory.__doc__
+        return accessor
+
+    return deco
+
+
+def loaded() -> list[str]:
+    return sorted(_instances)
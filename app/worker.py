@@ -1,13 +1,318 @@
+"""
+Ingestion daemon:
+
+    python -m app.worker
+
+Polls every author in INGEST_TARGETS (comma-separated newsletter URLs; all
+known authors when unset) for new posts, INGEST_LIMIT at most per poll.
+Each author's next poll is scheduled from how often they have published
+(posts.published_at), so prolific writers are checked often and dormant
+ones rarely.
+
+Polls are enqueued as incremental ingest_author jobs and drained by this
+process's own job workers, WORKER_CONCURRENCY authors at a time, so they
+are serialized with API-triggered work for the same author and can be
+spread over several daemons. SIGTERM/SIGINT stops scheduling and lets the
+jobs in hand finish. Liveness and lag are served as JSON on
+WORKER_METRICS_PORT (/healthz, /metrics).
+"""
+
+import json
+import os
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
 from app.db.engine import get_engine
-from app.ingestion.pipeline import ingest_author
+from app.db.jobs import last_finished, queue_stats
+from app.db.queries import get_publishing_stats, list_authors, upsert_author
+from app.ingestion.backfill import backfill_author
+from app.ingestion.pipeline import ingest_author, parse_subdomain
+from app.jobs import author_lock, start_job_workers, submit
+
+INGEST_LIMIT = int(os.getenv("INGEST_LIMIT", "10"))
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "3"))
+WORKER_MIN_POLL_S = float(os.getenv("WORKER_MIN_POLL_S", "900"))
+WORKER_MAX_POLL_S = float(os.getenv("WORKER_MAX_POLL_S", "86400"))
+# poll this many times per typical gap between an author's posts
+WORKER_POLLS_PER_GAP = float(os.getenv("WORKER_POLLS_PER_GAP", "4"))
+WORKER_TICK_S = float(os.getenv("WORKER_TICK_S", "30"))
+WORKER_REFRESH_S = float(os.getenv("WORKER_REFRESH_S", "600"))
+WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "8081"))  # 0 = off
+
+
+def run_ingestion(
+    targets: list[str],
+    limit: int = 10,
+    workers: int | None = None,
+    replay: bool = False,
+    incremental: bool = False,
+):
+    engine = get_engine()
+    results = []
+
+    for url in targets:
+        result = ingest_author(
+            engine,
+            url,
+            limit_posts=limit,
+            workers=workers,
+            replay=replay,
+            incremental=incremental,
+        )
+        results.append({"url": url, "result": result})
+
+    return results
 
 
-def run_ingestion(targets: list[str], limit: int = 10):
+def run_backfill(
+    targets: list[str],
+    max_seconds: float | None = None,
+    max_llm_calls: int | None = None,
+    workers: int | None = None,
+    replay: bool = False,
+    restart: bool = False,
+):
     engine = get_engine()
     results = []
 
     for url in targets:
-        result = ingest_author(engine, url, limit_posts=limit)
+        result = backfill_author(
+            engine,
+            url,
+            max_seconds=max_seconds,
+            max_llm_calls=max_llm_calls,
+            workers=workers,
+            replay=replay,
+            restart=restart,
+        )
         results.append({"url": url, "result": result})
 
     return results
+
+
+# ---------- scheduling ----------
+
+
+def poll_interval(stats: dict | None, now: datetime) -> float:
+    """
+    Seconds until an author's next poll: a fraction of their typical gap
+    between posts, stretched for authors who have gone quiet for longer
+    than that, and clamped to [WORKER_MIN_POLL_S, WORKER_MAX_POLL_S].
+    Authors without enough history are polled at the minimum interval.
+    """
+    if not stats or stats.get("median_gap_s") is None:
+        return WORKER_MIN_POLL_S
+    quiet_s = (now - stats["last_published"]).total_seconds()
+    interval = max(stats["median_gap_s"], quiet_s) / WORKER_POLLS_PER_GAP
+    return min(max(interval, WORKER_MIN_POLL_S), WORKER_MAX_POLL_S)
+
+
+def parse_targets(raw: str) -> list[str]:
+    return [t.strip() for t in raw.replace("\n", ",").split(",") if t.strip()]
+
+
+class PollScheduler:
+    """
+    author_id -> {url, interval_s, next_at}. Each tick enqueues a poll for
+    every author that is due and schedules its next one.
+    """
+
+    def __init__(self, engine, targets: list[str], limit: int = INGEST_LIMIT):
+        self.engine = engine
+        self.targets = targets
+        self.limit = limit
+        self.authors = {}
+        self.started_at = time.time()
+        self.last_tick = None
+        self.last_refresh = 0.0
+        self.polls = 0
+        self.enqueue_errors = 0
+        self._lock = threading.Lock()
+
+    def _now(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    def refresh(self):
+        """Re-reads the author list and everyone's publishing cadence."""
+        if self.targets:
+            found = {}
+            for url in self.targets:
+                subdomain = parse_subdomain(url)
+                found[upsert_author(self.engine, subdomain=subdomain, name=subdomain)] = url
+        else:
+            found = {
+                a["id"]: f"https://{a['subdomain']}.substack.com" for a in list_authors(self.engine)
+            }
+
+        stats = get_publishing_stats(self.engine, list(found))
+        finished = last_finished(self.engine, "ingest_author")
+        now = self._now()
+
+        with self._lock:
+            for author_id in list(self.authors):
+                if author_id not in found:
+                    del self.authors[author_id]
+            for author_id, url in found.items():
+                interval = poll_interval(stats.get(author_id), now)
+                entry = self.authors.get(author_id)
+                if entry is None:
+                    # pick up where the last successful poll left off, spread
+                    # out so a restart doesn't poll everyone at once
+                    last = finished.get(author_lock(author_id))
+                    next_at = (
+                        last.timestamp() + interval
+                        if last
+                        else time.time() + random.uniform(0, min(interval, WORKER_TICK_S * 2))
+                    )
+                    entry = self.authors[author_id] = {"url": url, "next_at": next_at}
+                entry["url"] = url
+                entry["interval_s"] = interval
+                entry["last_published"] = (stats.get(author_id) or {}).get("last_published")
+        self.last_refresh = time.time()
+
+    def tick(self):
+        if time.time() - self.last_refresh >= WORKER_REFRESH_S:
+            self.refresh()
+
+        now = time.time()
+        with self._lock:
+            due = [(a, e) for a, e in self.authors.items() if e["next_at"] <= now]
+
+        for author_id, entry in due:
+            try:
+                job = submit(
+                    self.engine,
+                    "ingest_author",
+                    {"url": entry["url"], "limit": self.limit, "incremental": True},
+                    author_id=author_id,
+                )
+            except Exception as e:
+                print(f"[warn] could not enqueue poll for {entry['url']}: {e}")
+                self.enqueue_errors += 1
+                continue
+            with self._lock:
+                entry["job_id"] = job["job_id"]
+                entry["enqueued_at"] = now
+                # +-10% so authors with the same cadence drift apart
+                entry["next_at"] = now + entry["interval_s"] * random.uniform(0.9, 1.1)
+            self.polls += 1
+
+        self.last_tick = time.time()
+
+    def seconds_to_next(self) -> float:
+        with self._lock:
+            nxt = min((e["next_at"] for e in self.authors.values()), default=None)
+        if nxt is None:
+            return WORKER_TICK_S
+        return min(max(nxt - time.time(), 0.0), WORKER_TICK_S)
+
+    def run(self, stop: threading.Event):
+        while not stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"[error] scheduler tick failed: {e}")
+            stop.wait(self.seconds_to_next() or 1.0)
+
+    # ---------- metrics ----------
+
+    def healthy(self) -> bool:
+        # the loop wakes at least every WORKER_TICK_S
+        return self.last_tick is not None and time.time() - self.last_tick < 3 * WORKER_TICK_S + 60
+
+    def metrics(self) -> dict:
+        now = time.time()
+        finished = last_finished(self.engine, "ingest_author")
+        authors = []
+        with self._lock:
+            for author_id, e in self.authors.items():
+                last = finished.get(author_lock(author_id))
+                age = now - last.timestamp() if last else None
+                authors.append(
+                    {
+                        "author_id": author_id,
+                        "url": e["url"],
+                        "interval_s": round(e["interval_s"]),
+                        "next_poll_in_s": round(e["next_at"] - now),
+                        "last_success_age_s": round(age) if age is not None else None,
+                        # how far past its own interval the author's data is
+                        "lag_s": round(max(0.0, age - e["interval_s"])) if age is not None else None,
+                        "last_published": e.get("last_published"),
+                    }
+                )
+        lags = [a["lag_s"] for a in authors if a["lag_s"] is not None]
+        return {
+            "healthy": self.healthy(),
+            "uptime_s": round(now - self.started_at),
+            "last_tick_age_s": round(now - self.last_tick, 1) if self.last_tick else None,
+            "polls_enqueued": self.polls,
+            "enqueue_errors": self.enqueue_errors,
+            "authors": len(authors),
+            "max_lag_s": max(lags, default=0),
+            "lagging_authors": sum(1 for x in lags if x > 0),
+            "queue": queue_stats(self.engine),
+            "per_author": sorted(authors, key=lambda a: -(a["lag_s"] or 0)),
+        }
+
+
+def serve_metrics(scheduler: PollScheduler, port: int) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/healthz":
+                ok = scheduler.healthy()
+                status, body = (200 if ok else 503), {"healthy": ok}
+            elif self.path == "/metrics":
+                try:
+                    status, body = 200, scheduler.metrics()
+                except Exception as e:
+                    status, body = 500, {"error": str(e)}
+            else:
+                status, body = 404, {"error": "not found"}
+            data = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass  # polled by health checks; keep the log quiet
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="worker-metrics", daemon=True).start()
+    return server
+
+
+def main():
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+
+    engine = get_engine()
+    scheduler = PollScheduler(engine, parse_targets(os.getenv("INGEST_TARGETS", "")))
+    scheduler.refresh()
+    print(f"worker: polling {len(scheduler.authors)} authors, {WORKER_CONCURRENCY} at a time")
+
+    server = serve_metrics(scheduler, WORKER_METRICS_PORT) if WORKER_METRICS_PORT else None
+    workers = start_job_workers(engine, WORKER_CONCURRENCY, stop)
+
+    scheduler.run(stop)
+
+    print("worker: stopping; finishing jobs in progress")
+    for t in workers:
+        t.join()
+    if server:
+        server.shutdown()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
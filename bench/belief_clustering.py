@@ -0,0 +1,92 @@
+"""
+Runtime and peak memory of belief clustering on synthetic claim
+embeddings: the old dense float64 n x n matrix + Python double loop
+against the blocked float32 assign_claims(), plus the incremental case
+(1% new claims assigned to existing centroids).
+
+    python -m bench.belief_clustering                    # 1k, 10k, 100k
+    python -m bench.belief_clustering --sizes 1000 5000 --old-max 5000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from app.analysis.build_beliefs import THRESH, assign_claims
+
+DIM = 384
+
+
+def synthetic(n: int, seed: int = 0) -> np.ndarray:
+    # ~n/20 topics; members sit well inside THRESH of their topic
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((max(1, n // 20), DIM)).astype(np.float32)
+    topics /= np.linalg.norm(topics, axis=1, keepdims=True)
+    X = topics[rng.integers(0, len(topics), n)]
+    X = X + rng.standard_normal((n, DIM)).astype(np.float32) * 0.02
+    return X / np.linalg.norm(X, axis=1, keepdims=True)
+
+
+def old_path(X):
+    X = X.astype(np.float64)
+    X = X / np.linalg.norm(X, axis=1, keepdims=True)
+    sim = X @ X.T
+
+    groups = []
+    used = set()
+    for i in range(len(X)):
+        if i in used:
+            continue
+        group_idx = [i]
+        used.add(i)
+        for j in range(i + 1, len(X)):
+            if j in used:
+                continue
+            if sim[i][j] >= THRESH:
+                group_idx.append(j)
+                used.add(j)
+        groups.append(group_idx)
+    return groups
+
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return out, elapsed, peak
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    ap.add_argument("--old-max", type=int, default=10000, help="skip the old path above this")
+    args = ap.parse_args()
+
+    print(f"{'claims':>8} {'path':<12} {'beliefs':>8} {'seconds':>9} {'peak MiB':>9}")
+    for n in args.sizes:
+        X = synthetic(n)
+        input_mib = X.nbytes / 2**20
+
+        if n <= args.old_max:
+            groups, t, peak = measure(old_path, X)
+            print(f"{n:>8} {'old':<12} {len(groups):>8} {t:>9.2f} {peak / 2**20:>9.1f}")
+        else:
+            print(f"{n:>8} {'old':<12} {'-':>8} {'skipped':>9} {n * n * 8 / 2**20:>9.0f} (sim matrix alone)")
+
+        (labels, centroids, counts), t, peak = measure(assign_claims, X)
+        print(f"{n:>8} {'blocked':<12} {len(centroids):>8} {t:>9.2f} {peak / 2**20:>9.1f}")
+
+        cut = n - max(1, n // 100)
+        _, base, counts = assign_claims(X[:cut])
+        (_, after, _), t, peak = measure(assign_claims, X[cut:], base, counts)
+        print(f"{n:>8} {'incremental':<12} {len(after):>8} {t:>9.3f} {peak / 2**20:>9.1f}"
+              f"  ({n - cut} new claims; input {input_mib:.0f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
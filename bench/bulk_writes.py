@@ -0,0 +1,117 @@
+"""
+Rows/sec writing post_chunks-shaped rows (ints + a 384-d vector) to a
+scratch table: one execute per row (the old path), a single executemany,
+and app.db.bulk.insert_rows at several batch sizes. Also times
+update_rows against per-row UPDATEs.
+
+Needs a Postgres with the vector extension:
+
+    python -m bench.bulk_writes --dsn postgresql://localhost/postgres
+    python -m bench.bulk_writes --dsn ... --rows 5000 --batches 100 500 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+from app.db.bulk import insert_rows, update_rows
+from app.db.vectors import install, to_db
+
+DIM = 384
+COLUMNS = ["post_id", "chunk_index", "start_offset", "end_offset", "embedding"]
+
+
+def make_rows(n):
+    X = np.random.default_rng(0).standard_normal((n, DIM)).astype(np.float32)
+    return [
+        {
+            "post_id": i // 20,
+            "chunk_index": i % 20,
+            "start_offset": i * 800,
+            "end_offset": i * 800 + 799,
+            "embedding": to_db(v),
+        }
+        for i, v in enumerate(X)
+    ]
+
+
+def timed(engine, fn):
+    with engine.begin() as conn:
+        conn.execute(text("truncate bench_chunks"))
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        fn(conn)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dsn", required=True)
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--batches", type=int, nargs="+", default=[50, 200, 500, 1000])
+    args = ap.parse_args()
+
+    engine = install(create_engine(args.dsn))
+    with engine.begin() as conn:
+        conn.execute(text("create extension if not exists vector"))
+        conn.execute(text(f"""
+            create table if not exists bench_chunks (
+                id bigserial primary key,
+                post_id int, chunk_index int, start_offset int, end_offset int,
+                embedding vector({DIM})
+            )
+        """))
+
+    rows = make_rows(args.rows)
+    n = len(rows)
+    ins = text("""
+        insert into bench_chunks (post_id, chunk_index, start_offset, end_offset, embedding)
+        values (:post_id, :chunk_index, :start_offset, :end_offset, cast(:embedding as vector))
+    """)
+
+    def per_row(conn):
+        for r in rows:
+            conn.execute(ins, r)
+
+    results = [
+        ("insert, one execute per row", timed(engine, per_row)),
+        ("insert, executemany", timed(engine, lambda c: c.execute(ins, rows))),
+    ]
+    for size in args.batches:
+        results.append((
+            f"insert_rows batch={size}",
+            timed(engine, lambda c: insert_rows(
+                c, "bench_chunks", COLUMNS, rows, casts={"embedding": "vector"}, batch_size=size
+            )),
+        ))
+
+    with engine.begin() as conn:
+        ids = conn.execute(text("select id from bench_chunks order by id")).scalars().all()
+    updates = [{"id": i, "embedding": r["embedding"]} for i, r in zip(ids, rows)]
+    upd = text("update bench_chunks set embedding = cast(:embedding as vector) where id = :id")
+
+    def timed_update(fn):
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            fn(conn)
+        return time.perf_counter() - t0
+
+    results.append(("update, one execute per row", timed_update(
+        lambda c: [c.execute(upd, u) for u in updates]
+    )))
+    results.append(("update_rows batch=500", timed_update(
+        lambda c: update_rows(c, "bench_chunks", "id", ["embedding"], updates,
+                              casts={"embedding": "vector"}, batch_size=500)
+    )))
+
+    with engine.begin() as conn:
+        conn.execute(text("drop table bench_chunks"))
+
+    for name, secs in results:
+        print(f"{name:<30} {n / secs:>10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+How many chunks a small edit forces to be re-embedded: greedy packing
+(every boundary after an edit moves) against content-defined boundaries.
+Runs on generated posts; no model or database needed:
+
+    python -m bench.chunk_stability --posts 200
+"""
+
+import argparse
+import random
+import statistics
+
+from app.ingestion.chunker import CHUNK_TOKENS, chunk_spans, estimate_tokens
+
+WORDS = (
+    "the of market policy people growth state power money war trade new "
+    "rate labor price debt vote tax law data risk city union energy bank "
+    "court school health crisis reform plan time history argument evidence"
+).split()
+
+
+def sentence(rng) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 28))).capitalize() + "."
+
+
+def paragraph(rng) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.choice([1, 1, 2, 3, 4, 6])))
+
+
+def edits(rng, paras):
+    """(name, edited paragraphs) for a few typical local edits."""
+    mid = len(paras) // 2
+    top = min(1, len(paras) - 1)
+
+    words = paras[mid].split()
+    typo = paras[:]
+    typo[mid] = " ".join(words[:-1] + [words[-1] + "s"])
+
+    added = paras[:]
+    added[mid] = paras[mid] + " " + sentence(rng)
+
+    inserted = paras[:top] + [paragraph(rng)] + paras[top:]
+    deleted = paras[:top] + paras[top + 1 :]
+    return [
+        ("typo", typo),
+        ("sentence added", added),
+        ("paragraph inserted", inserted),
+        ("paragraph deleted", deleted),
+    ]
+
+
+def chunks(paras, content_defined: bool) -> list[str]:
+    text = "\n".join(paras)
+    kw = {} if content_defined else {"target_tokens": 10**12, "min_tokens": 0}
+    return [text[a:b] for a, b in chunk_spans(text, **kw)]
+
+
+def new_chunks(before: list[str], after: list[str]) -> int:
+    # chunks whose text isn't among the old ones need a fresh embedding
+    old = {}
+    for c in before:
+        old[c] = old.get(c, 0) + 1
+    n = 0
+    for c in after:
+        if old.get(c):
+            old[c] -= 1
+        else:
+            n += 1
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=200)
+    ap.add_argument("--paragraphs", type=int, default=40)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    posts = [[paragraph(rng) for _ in range(args.paragraphs)] for _ in range(args.posts)]
+    # the same edits for both chunkers
+    edited_posts = [edits(rng, paras) for paras in posts]
+
+    for label, cdc in (("greedy", False), ("content-defined", True)):
+        sizes = []
+        counts = []
+        redone = {}
+        for paras, variants in zip(posts, edited_posts):
+            base = chunks(paras, cdc)
+            sizes += [estimate_tokens(c) for c in base]
+            counts.append(len(base))
+            for name, edited in variants:
+                after = chunks(edited, cdc)
+                redone.setdefault(name, []).append((new_chunks(base, after), len(after)))
+
+        print(
+            f"{label:>16}: {statistics.mean(counts):5.1f} chunks/post, "
+            f"{statistics.mean(sizes):5.1f} tokens/chunk (max {CHUNK_TOKENS}), "
+            f"max {max(sizes)}"
+        )
+        for name, runs in redone.items():
+            n = statistics.mean(r[0] for r in runs)
+            share = statistics.mean(r[0] / r[1] for r in runs) * 100
+            print(f"{'':>18}{name:<20} re-embeds {n:4.2f} chunks ({share:4.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
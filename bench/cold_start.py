@@ -0,0 +1,58 @@
+"""
+Cold start: wall time from interpreter start to the first `GET /` response,
+in a fresh process each run, plus which heavy modules were imported on the
+way. Nothing here should need torch, the embedding model or a Groq key.
+
+    python -m bench.cold_start --runs 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY = ("torch", "sentence_transformers", "onnxruntime", "groq", "transformers")
+
+PROBE = f"""
+import json, sys, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+resp = TestClient(app.main.app).get("/")
+t2 = time.perf_counter()
+from app import registry
+print(json.dumps({{
+    "import_s": t1 - t0,
+    "first_get_s": t2 - t0,
+    "status": resp.status_code,
+    "heavy_loaded": [m for m in {HEAVY!r} if m in sys.modules],
+    "resources_loaded": registry.loaded(),
+}}))
+"""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True
+        ).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+
+    imp = statistics.median(r["import_s"] for r in runs)
+    first = statistics.median(r["first_get_s"] for r in runs)
+    print(f"runs: {args.runs}  status: {runs[-1]['status']}")
+    print(f"import app.main:      {imp * 1000:7.0f} ms (median)")
+    print(f"until GET / answered: {first * 1000:7.0f} ms (median)")
+    print(f"heavy modules loaded: {runs[-1]['heavy_loaded'] or 'none'}")
+    print(f"registry resources:   {runs[-1]['resources_loaded'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
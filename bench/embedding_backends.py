@@ -0,0 +1,100 @@
+"""
+torch vs int8 ONNX embedding backends: load time, texts/sec, peak RSS and
+cosine agreement with the torch vectors. Each backend runs in its own
+process so RSS is not shared.
+
+    python -m app.ai.onnx_embedder export   # once
+    python -m bench.embedding_backends --n 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+WORDS = (
+    "the author argues that markets education policy forecasting language models "
+    "inflation housing regulation incentives evidence uncertainty history culture "
+    "attention institutions trust progress risk science writing readers"
+).split()
+
+
+def make_texts(n: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(8, 120))) for _ in range(n)]
+
+
+def run_worker(backend: str, n: int, out: str):
+    os.environ["EMBEDDING_BACKEND"] = backend
+    t0 = time.perf_counter()
+    from app.ai.model_store import get_embedding_model
+
+    model = get_embedding_model()
+    model.encode(["warm up"], normalize_embeddings=True)
+    load_s = time.perf_counter() - t0
+
+    texts = make_texts(n)
+    t0 = time.perf_counter()
+    vecs = np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    encode_s = time.perf_counter() - t0
+
+    np.save(out, vecs)
+    print(
+        json.dumps(
+            {
+                "backend": backend,
+                "load_s": round(load_s, 2),
+                "texts_per_s": round(n / encode_s, 1),
+                "max_rss_mib": round(
+                    resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+                ),
+            }
+        )
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=2000)
+    ap.add_argument("--worker")
+    ap.add_argument("--out")
+    args = ap.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.n, args.out)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("torch", "onnx"):
+            out = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run(
+                [sys.executable, "-m", "bench.embedding_backends",
+                 "--worker", backend, "--n", str(args.n), "--out", out],
+                capture_output=True, text=True, check=True,
+            )
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            results[backend]["vecs"] = np.load(out)
+
+    cos = (results["torch"]["vecs"] * results["onnx"]["vecs"]).sum(axis=1)
+
+    for r in results.values():
+        print(
+            f"{r['backend']:>6}: load {r['load_s']:6.2f}s  "
+            f"{r['texts_per_s']:8.1f} texts/s  peak RSS {r['max_rss_mib']:7.1f} MiB"
+        )
+    print(
+        f"cosine(onnx, torch) over {args.n} texts: "
+        f"mean {cos.mean():.4f}  min {cos.min():.4f}  p1 {np.percentile(cos, 1):.4f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
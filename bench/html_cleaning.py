@@ -0,0 +1,109 @@
+"""
+Per-post CPU and peak memory of HTML cleaning: the old path (three
+html.parser parses: html_to_text + both title extractors) against the
+single-parse cleaner.extract().
+
+    python -m bench.html_cleaning                  # posts from HTML_STORE_DIR
+    python -m bench.html_cleaning --dir posts/     # *.html files
+    python -m bench.html_cleaning --synthetic 50   # generated ~40 KB posts
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from app.ingestion.cleaner import PARSER, extract
+from app.ingestion.html_store import STORE_DIR, HtmlStore
+
+
+def old_path(html: str):
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    lines = [l.strip() for l in soup.get_text("\n").splitlines() if l.strip()]
+    text = "\n".join(lines)
+
+    soup = BeautifulSoup(html, "html.parser")
+    og = soup.find("meta", property="og:title")
+    title = og["content"] if og and og.get("content") else None
+    if not title:
+        h1 = soup.find("h1")
+        title = h1.get_text(strip=True) if h1 else None
+
+    soup = BeautifulSoup(html, "html.parser")
+    h1 = soup.find("h1")
+    return text, title, h1.get_text(strip=True) if h1 else None
+
+
+def new_path(html: str):
+    return extract(html)
+
+
+def load_corpus(args) -> list[str]:
+    if args.dir:
+        return [
+            open(p, encoding="utf-8").read()
+            for p in sorted(glob.glob(os.path.join(args.dir, "*.html")))
+        ]
+    if args.synthetic:
+        para = "<p>" + "Substack posts are long and full of <a href='#'>links</a>. " * 12 + "</p>"
+        body = "<h1>Synthetic post</h1>" + para * 60 + "<script>var x = 1;</script>"
+        return [body] * args.synthetic
+
+    if not STORE_DIR:
+        raise SystemExit("set HTML_STORE_DIR, or pass --dir or --synthetic")
+    store = HtmlStore(STORE_DIR)
+    corpus = []
+    for index in glob.glob(os.path.join(STORE_DIR, "index", "*.jsonl")):
+        host = os.path.basename(index)[: -len(".jsonl")]
+        for url in store.urls(host, "post"):
+            html = json.loads(store.latest(host, url)).get("body_html")
+            if html:
+                corpus.append(html)
+    return corpus
+
+
+def measure(fn, corpus):
+    t0 = time.process_time()
+    for html in corpus:
+        fn(html)
+    cpu = time.process_time() - t0
+
+    peaks = []
+    for html in corpus[:20]:
+        tracemalloc.start()
+        fn(html)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return cpu / len(corpus), sum(peaks) / len(peaks)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir")
+    ap.add_argument("--synthetic", type=int, default=0)
+    args = ap.parse_args()
+
+    corpus = load_corpus(args)
+    if not corpus:
+        raise SystemExit("empty corpus; ingest something first or pass --synthetic N")
+
+    avg_kb = sum(len(h) for h in corpus) / len(corpus) / 1024
+    print(f"{len(corpus)} posts, avg {avg_kb:.0f} KB, fast parser: {PARSER}")
+
+    old_cpu, old_mem = measure(old_path, corpus)
+    new_cpu, new_mem = measure(new_path, corpus)
+
+    print(f"old (3x html.parser): {old_cpu * 1000:8.1f} ms/post  peak {old_mem / 2**20:6.1f} MiB")
+    print(f"new (1x {PARSER:<11}): {new_cpu * 1000:8.1f} ms/post  peak {new_mem / 2**20:6.1f} MiB")
+    print(f"cpu {old_cpu / new_cpu:.1f}x faster, peak memory {old_mem / new_mem:.1f}x lower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Serial vs staged ingest_author, with Substack / Groq / Postgres replaced
+by fakes that sleep for a realistic latency. Measures only the scheduling
+win, so it runs without network, API keys or a database:
+
+    python -m bench.ingest_concurrency --posts 40 --workers 8
+"""
+
+import argparse
+import sys
+import time
+import types
+
+SAMPLE_HTML = "<html><body><h1>Post</h1>" + "<p>Some paragraph text.</p>" * 400 + "</body></html>"
+
+
+def install_fakes(args):
+    def sleep_ms(ms):
+        time.sleep(ms / 1000)
+
+    class FakePost:
+        def __init__(self, i):
+            self.url = f"https://bench.substack.com/p/post-{i}"
+            self.slug = f"post-{i}"
+            self.post_date = "2024-01-01T00:00:00Z"
+
+    class FakeClient:
+        def __init__(self, newsletter_url, **kw):
+            self.newsletter_url = newsletter_url
+            self.validators = {}
+            self.replay = kw.get("replay", False)
+
+        def get_posts(self, limit=20):
+            return [FakePost(i) for i in range(limit)]
+
+        def get_post(self, url, etag=None, last_modified=None):
+            sleep_ms(args.fetch_ms)
+            return {"title": url.rsplit("/", 1)[-1], "body_html": SAMPLE_HTML}
+
+    from app.db.engine import count_round_trips
+
+    def db_call(result=None, statements=1):
+        # one transaction: pool checkout (pre-ping), BEGIN/COMMIT, statements
+        def f(*a, **kw):
+            sleep_ms(args.db_ms)
+            count_round_trips("checkouts")
+            count_round_trips("transactions")
+            count_round_trips("statements", statements)
+            return result() if callable(result) else result
+
+        return f
+
+    ids = iter(range(1, 10**9))
+
+    queries = types.ModuleType("app.db.queries")
+    queries.upsert_author = db_call(1)
+    queries.get_author_watermark = db_call(None)
+    queries.advance_author_watermark = db_call()
+    queries.get_post_states = db_call({})
+    queries.get_post_progress = db_call({})
+    queries.upsert_post_shells = lambda engine, author_id, shells: db_call(
+        lambda: {sh["url"]: next(ids) for sh in shells}
+    )()
+    # content, chunks (delete + insert), analysis, claims, processed flag
+    queries.persist_post = db_call(statements=6)
+    queries.find_analysis_by_hash = db_call(None)
+    queries.get_author_analyses = db_call([])
+    queries.upsert_author_profile = db_call()
+
+    client_mod = types.ModuleType("app.ingestion.substack_client")
+    client_mod.SubstackClient = FakeClient
+    client_mod.ARCHIVE_PAGE_SIZE = 12
+
+    embeddings = types.ModuleType("app.ai.embeddings")
+    # fixed per-call overhead plus per-text cost, so micro-batching shows up
+    embeddings.embed_texts = lambda texts: (
+        sleep_ms(args.embed_ms + args.embed_text_ms * len(texts))
+        or [[0.0] * 384 for _ in texts]
+    )
+
+    analysis = types.ModuleType("app.ai.groq_analysis")
+    analysis.PROMPT_VERSION = "bench"
+    analysis.MAX_CALLS_PER_ARTICLE = 2
+    analysis.article_prompt_hash = lambda text: "h"
+    analysis.analyze_article = lambda text, priority=None, on_call=None: (
+        (on_call and on_call())
+        or sleep_ms(args.llm_ms)
+        or ({"main_claim": "x", "confidence": 0.5}, "bench", "h")
+    )
+
+    sys.modules.update(
+        {
+            "app.db.queries": queries,
+            "app.ingestion.substack_client": client_mod,
+            "app.ai.embeddings": embeddings,
+            "app.ai.groq_analysis": analysis,
+        }
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=40)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--fetch-ms", type=float, default=300)
+    ap.add_argument("--llm-ms", type=float, default=2500)
+    ap.add_argument("--db-ms", type=float, default=15)
+    ap.add_argument("--embed-ms", type=float, default=40)
+    ap.add_argument("--embed-text-ms", type=float, default=3)
+    args = ap.parse_args()
+
+    install_fakes(args)
+    from app.ingestion.pipeline import ingest_author
+
+    url = "https://bench.substack.com"
+    serial = ingest_author(None, url, limit_posts=args.posts, workers=1)
+    concurrent = ingest_author(None, url, limit_posts=args.posts, workers=args.workers)
+
+    for name, r in (("serial", serial), (f"workers={args.workers}", concurrent)):
+        print(
+            f"{name:>12}: {r['elapsed_s']:7.2f}s  "
+            f"{r['posts_seen'] / r['elapsed_s']:6.2f} posts/s  "
+            f"processed={r['processed']} errors={r['errors']}  "
+            f"db round trips/post={r['db_round_trips_per_post']}"
+        )
+    print(f"     speedup: {serial['elapsed_s'] / concurrent['elapsed_s']:.1f}x")
+
+    print("\nstage            in   busy_s  items/busy_s  max_queue  blocked_s")
+    for name, st in concurrent["stages"].items():
+        print(
+            f"{name:<12} {st['items_in']:>6} {st['busy_s']:>8} "
+            f"{st['items_per_busy_s'] or 0:>13} {st['max_queue_depth']:>10} "
+            f"{st['blocked_downstream_s']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
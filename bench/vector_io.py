@@ -0,0 +1,92 @@
+"""
+Rows/sec for moving 384-d embeddings across the DB boundary: the old text
+path (JSON/list literals out, np.fromstring per row back) against
+app.db.vectors (adapter or literal out, binary vector_send back, decoded
+into one matrix).
+
+    python -m bench.vector_io                       # codec only, no database
+    python -m bench.vector_io --dsn postgresql://... # round trips to a scratch table
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.db.vectors import HAVE_PGVECTOR, binary, stack, to_db
+
+DIM = 384
+
+
+def rate(n, fn):
+    t0 = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - t0)
+
+
+def fake_send(vec) -> bytes:
+    # what vector_send returns: int16 dim, int16 unused, big-endian float4s
+    return np.array([len(vec), 0], dtype=">i2").tobytes() + vec.astype(">f4").tobytes()
+
+
+def codec(X):
+    n = len(X)
+    texts = [json.dumps(v.tolist()) for v in X]
+    blobs = [fake_send(v) for v in X]
+
+    print(f"codec only, {n} rows, pgvector adapter: {HAVE_PGVECTOR}")
+    print(f"  encode  old json.dumps     {rate(n, lambda: [json.dumps(v.tolist()) for v in X]):>12,.0f} rows/s")
+    print(f"  encode  to_db              {rate(n, lambda: [to_db(v) for v in X]):>12,.0f} rows/s")
+    print(f"  decode  old np.fromstring  {rate(n, lambda: np.vstack([np.fromstring(t.strip('[]'), sep=',') for t in texts])):>12,.0f} rows/s")
+    print(f"  decode  binary stack()     {rate(n, lambda: stack(blobs)):>12,.0f} rows/s")
+
+
+def roundtrip(X, dsn):
+    from sqlalchemy import text
+
+    from app.db.vectors import install
+    from sqlalchemy import create_engine
+
+    engine = install(create_engine(dsn))
+    n = len(X)
+    with engine.begin() as conn:
+        conn.execute(text(f"create temp table if not exists bench_vec (id int, v vector({DIM}))"))
+        conn.execute(text("truncate bench_vec"))
+
+        ins = text("insert into bench_vec (id, v) values (:id, cast(:v as vector))")
+        save_old = rate(n, lambda: conn.execute(ins, [{"id": i, "v": json.dumps(v.tolist())} for i, v in enumerate(X)]))
+        conn.execute(text("truncate bench_vec"))
+        save_new = rate(n, lambda: conn.execute(ins, [{"id": i, "v": to_db(v)} for i, v in enumerate(X)]))
+
+        def load_old():
+            rows = conn.execute(text("select v::text from bench_vec order by id")).scalars().all()
+            return np.vstack([np.fromstring(r.strip("[]"), sep=",") for r in rows])
+
+        def load_new():
+            rows = conn.execute(text(f"select {binary('v')} from bench_vec order by id")).scalars().all()
+            return stack(rows)
+
+        load_old_r, load_new_r = rate(n, load_old), rate(n, load_new)
+
+    print(f"postgres round trips, {n} rows, pgvector adapter: {HAVE_PGVECTOR}")
+    print(f"  save  old text   {save_old:>10,.0f} rows/s")
+    print(f"  save  to_db      {save_new:>10,.0f} rows/s")
+    print(f"  load  old text   {load_old_r:>10,.0f} rows/s")
+    print(f"  load  binary     {load_new_r:>10,.0f} rows/s")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20000)
+    ap.add_argument("--dsn")
+    args = ap.parse_args()
+
+    X = np.random.default_rng(0).standard_normal((args.rows, DIM)).astype(np.float32)
+    codec(X)
+    if args.dsn:
+        roundtrip(X, args.dsn)
+
+
+if __name__ == "__main__":
+    main()